@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.core.llm_cache import llm_cache, prompt_version
+from app.core.metrics import MESSAGE_ANALYSES, PERSONA_EXTRACTIONS, PERSONA_FIELDS_REJECTED
+from app.core.openai_client import async_chat_completion
+from app.guardrails.local_classifier import SAFETY_INTENTS, local_classify
+from app.guardrails.service import ALLOWED_INTENTS, INTENT_GUIDE, classify_intent_with_llm
+from app.persona.normalize import normalize_persona
+from app.persona.service import (
+    EXTRACTABLE_FIELDS,
+    FIELD_HINTS,
+    extract_persona_with_llm,
+    has_persona_signal,
+    parse_extraction,
+    persona_schema,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# MESSAGE ANALYSIS (INTENT + PERSONA)
+# ─────────────────────────────────────────────
+# Intent classification and persona extraction read the same user
+# message. When both need the LLM they are asked for in ONE structured
+# call, so the message is sent (and paid for) once per turn.
+#
+#   local classifier decides + no persona signal → no LLM call
+#   only one of the two needs the LLM           → that call alone
+#   both need the LLM                           → one combined call
+
+INTENT_FALLBACK = "off_topic"
+
+ANALYSIS_SYSTEM_PROMPT = (
+    "You analyse one user message for a health chatbot: its category and "
+    "any profile details it states. When in doubt, choose a NON-medical "
+    "category. Return ONLY the requested object, no explanations."
+)
+
+ANALYSIS_PROMPT = """
+Analyse the user's message for a health & lifestyle chatbot.
+
+1. intent: classify the message into ONE of the following categories ONLY:
+
+{intent_guide}
+2. persona: extract details ONLY if they are explicitly stated.
+- Do NOT guess
+- Do NOT infer
+- If unsure, return null
+- Copy numbers with their units exactly as written (e.g. 5'8, 70kg)
+
+Persona fields:
+{fields}
+
+Output STRICT JSON only:
+{{"intent": "<category in lowercase>", "persona": {{"<field>": "<value or null>"}}}}
+
+User message:
+"{message}"
+"""
+
+ANALYSIS_PROMPT_VERSION = prompt_version(
+    ANALYSIS_SYSTEM_PROMPT,
+    ANALYSIS_PROMPT,
+    INTENT_GUIDE,
+    json.dumps(FIELD_HINTS, sort_keys=True),
+    settings.PERSONA_EXTRACTION_RESPONSE_FORMAT,
+)
+
+
+@dataclass
+class MessageAnalysis:
+    intent: str | None
+    persona: dict = field(default_factory=dict)
+
+
+def local_intent(message: str) -> str | None:
+    """
+    The intent when it needs no LLM call (empty message, or a confident
+    and clearly safe local verdict), else None.
+    """
+    if not message or not message.strip():
+        return INTENT_FALLBACK
+
+    if settings.INTENT_LOCAL_CLASSIFIER:
+        verdict = local_classify(message)
+        if not verdict.escalate:
+            return verdict.intent
+
+    return None
+
+
+def provisional_intent(message: str) -> str | None:
+    """
+    The local classifier's best guess, also when it would escalate;
+    None when a blocked category is plausible. Only used to start work
+    early (speculative reply), never as the final intent.
+    """
+    if not message or not message.strip():
+        return None
+
+    verdict = local_classify(message)
+    if verdict.source == "safety" or verdict.intent in SAFETY_INTENTS:
+        return None
+    return verdict.intent
+
+
+def plan_analysis(
+    message: str,
+    fields: list[str],
+    classify: bool = True,
+    asked_fields: list[str] | None = None,
+) -> tuple[str | None, str]:
+    """
+    (locally decided intent or None, path): which LLM calls the message
+    needs. local | classify | extract | combined | separate (both, as
+    two calls). Counts the path.
+
+    `asked_fields`: what the previous turn asked for (see
+    has_persona_signal).
+    """
+    intent = local_intent(message) if classify else None
+    need_intent = classify and intent is None
+    need_persona = bool(fields) and has_persona_signal(message, asked_fields)
+
+    if need_intent and need_persona:
+        path = "combined" if settings.MESSAGE_ANALYSIS_COMBINED else "separate"
+    elif need_intent:
+        path = "classify"
+    elif need_persona:
+        path = "extract"
+    else:
+        path = "local"
+
+    if path == "separate":
+        MESSAGE_ANALYSES.inc(path="classify")
+        MESSAGE_ANALYSES.inc(path="extract")
+    else:
+        MESSAGE_ANALYSES.inc(path=path)
+    return intent, path
+
+
+async def analyze_message(
+    message: str,
+    persona_fields: list[str] | None = None,
+    classify: bool = True,
+    asked_fields: list[str] | None = None,
+) -> MessageAnalysis:
+    """
+    Intent (when `classify`) and the still-missing `persona_fields`
+    (default: all) stated in `message`, with as few LLM calls as
+    possible. Never raises for a bad LLM response: each part falls back
+    to what its separate call would have returned.
+    """
+    fields = EXTRACTABLE_FIELDS if persona_fields is None else persona_fields
+    intent, path = plan_analysis(message, fields, classify, asked_fields)
+
+    if path == "local":
+        return MessageAnalysis(intent)
+
+    if path == "combined":
+        return await analyze_combined(message, fields)
+
+    if path == "classify":
+        return MessageAnalysis(await classify_intent_with_llm(message))
+
+    if path == "extract":
+        return MessageAnalysis(intent, await extract_persona_with_llm(message, fields))
+
+    # Combined call switched off: the two separate calls, concurrently.
+    intent, persona = await asyncio.gather(
+        classify_intent_with_llm(message),
+        extract_persona_with_llm(message, fields),
+        return_exceptions=True,
+    )
+    if isinstance(intent, Exception):
+        logger.warning("intent classification failed: %r", intent)
+        intent = INTENT_FALLBACK
+    if isinstance(persona, Exception):
+        logger.warning("persona extraction failed: %r", persona)
+        persona = {}
+    return MessageAnalysis(intent, persona)
+
+
+async def analyze_combined(message: str, fields: list[str]) -> MessageAnalysis:
+    """
+    The combined call, falling back to INTENT_FALLBACK and no persona
+    details when the model gives no usable answer.
+    """
+    analysis = await analyze_with_llm(message, fields)
+    if analysis is None:
+        MESSAGE_ANALYSES.inc(path="fallback")
+        return MessageAnalysis(INTENT_FALLBACK)
+    return analysis
+
+
+async def analyze_with_llm(message: str, fields: list[str]) -> MessageAnalysis | None:
+    """
+    One combined LLM call (no local fast path).
+    Results are cached per normalized message and requested fields.
+    """
+    version = f"{ANALYSIS_PROMPT_VERSION}:{','.join(fields)}"
+    result = await llm_cache.get_or_compute(
+        "analysis",
+        version,
+        message,
+        lambda: _ask_llm_for_analysis(message, fields),
+    )
+    if result is None:
+        return None
+    return MessageAnalysis(result["intent"], result["persona"])
+
+
+def analysis_response_format(fields: list[str]) -> dict | None:
+    mode = settings.PERSONA_EXTRACTION_RESPONSE_FORMAT
+    if mode == "json_object":
+        return {"type": "json_object"}
+    if mode != "json_schema":
+        return None
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "message_analysis",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "intent": {"type": "string", "enum": sorted(ALLOWED_INTENTS)},
+                    "persona": persona_schema(fields),
+                },
+                "required": ["intent", "persona"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def parse_analysis(data: dict, fields: list[str]) -> tuple[str | None, dict]:
+    """
+    (intent or None when not an allowed category, normalized persona).
+    """
+    intent = data.get("intent")
+    intent = intent.strip().lower() if isinstance(intent, str) else None
+    if intent not in ALLOWED_INTENTS:
+        intent = None
+
+    raw = data.get("persona")
+    values, rejected = normalize_persona(raw if isinstance(raw, dict) else {}, fields)
+    for f in rejected:
+        PERSONA_FIELDS_REJECTED.inc(field=f)
+
+    return intent, values
+
+
+async def _ask_llm_for_analysis(message: str, fields: list[str]) -> dict | None:
+    """
+    Returns None (not cached) when the model gives no usable intent.
+    """
+    options = {}
+    response_format = analysis_response_format(fields)
+    if response_format is not None:
+        options["response_format"] = response_format
+
+    result = await async_chat_completion([
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": ANALYSIS_PROMPT.format(
+            intent_guide=INTENT_GUIDE,
+            fields="\n".join(f"- {f}: {FIELD_HINTS.get(f, f)}" for f in fields),
+            message=message,
+        )},
+    ], purpose="analyze", **options)
+
+    data, label = parse_extraction(result)
+    PERSONA_EXTRACTIONS.inc(result=label)
+    if data is None:
+        return None
+
+    intent, persona = parse_analysis(data, fields)
+    if intent is None:
+        return None
+
+    return {"intent": intent, "persona": persona}
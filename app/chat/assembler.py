@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# TOKEN COUNTING
+# ─────────────────────────────────────────────
+# tiktoken is used when its encoding can be loaded (it downloads the BPE
+# file on first use). Otherwise we fall back to a ~4 chars/token
+# estimate, which is close enough for budgeting Hinglish/English text.
+#
+# Loading is blocking file / network I/O: the app does it once at
+# startup, off the event loop (load_encoding), never inside a turn.
+
+TOKENIZER_ENCODING = "o200k_base"  # gpt-4o family
+
+# Chat format framing per message (role, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+TRUNCATION_MARKER = " …[truncated]"
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+        except Exception:
+            logger.warning("tiktoken unavailable, using approximate token counts")
+            _encoding = None
+
+    return _encoding
+
+
+async def load_encoding():
+    """
+    Loads the tokenizer in a worker thread (app startup).
+    """
+    await asyncio.to_thread(_get_encoding)
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Keeps the beginning of `text` so that it fits in `max_tokens`.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget = max(0, max_tokens - count_tokens(TRUNCATION_MARKER))
+    encoding = _get_encoding()
+
+    if encoding is not None:
+        head = encoding.decode(encoding.encode(text)[:budget])
+    else:
+        head = text[:budget * 4]
+
+    return head.rstrip() + TRUNCATION_MARKER
+
+
+# ─────────────────────────────────────────────
+# PROMPT ASSEMBLY
+# ─────────────────────────────────────────────
+
+@dataclass
+class AssembledPrompt:
+    messages: list[dict]
+    # Tokens per section, e.g. {"system": 900, "summary": 120, "history": 2100}
+    breakdown: dict[str, int] = field(default_factory=dict)
+    history_included: int = 0
+    history_dropped: int = 0
+    history_truncated: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.breakdown.values())
+
+
+def _message_tokens(content: str) -> int:
+    return count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+@lru_cache(maxsize=1024)
+def _section_tokens(content: str) -> int:
+    # System sections repeat across turns (static prefix, persona
+    # context, stored summary), so their counts are memoized.
+    return _message_tokens(content)
+
+
+def assemble_prompt(
+    sections: list[tuple[str, str]],
+    history,
+    budget: int | None = None,
+    max_message_tokens: int | None = None,
+) -> AssembledPrompt:
+    """
+    Builds the chat messages for the main completion within a token budget.
+
+    - `sections` are (name, content) system messages, always included,
+      in order. Empty ones are skipped.
+    - `history` (oldest first, objects with .role / .content) is packed
+      newest-first until the budget is used up. Messages longer than
+      `max_message_tokens` are truncated. The newest message is always
+      kept, even if the sections alone already exceed the budget.
+    """
+    budget = budget or settings.PROMPT_TOKEN_BUDGET
+    max_message_tokens = max_message_tokens or settings.PROMPT_MAX_MESSAGE_TOKENS
+
+    prompt = AssembledPrompt(messages=[])
+
+    for name, content in sections:
+        if not content:
+            continue
+        prompt.messages.append({"role": "system", "content": content})
+        prompt.breakdown[name] = prompt.breakdown.get(name, 0) + _section_tokens(content)
+
+    remaining = budget - prompt.total_tokens
+    packed = []
+    history_tokens = 0
+
+    for m in reversed(history):
+        content = m.content or ""
+        if count_tokens(content) > max_message_tokens:
+            content = truncate_to_tokens(content, max_message_tokens)
+            prompt.history_truncated += 1
+
+        tokens = _message_tokens(content)
+        if packed and history_tokens + tokens > remaining:
+            break
+
+        packed.append({"role": m.role, "content": content})
+        history_tokens += tokens
+
+    packed.reverse()
+    prompt.messages.extend(packed)
+    prompt.breakdown["history"] = history_tokens
+    prompt.history_included = len(packed)
+    prompt.history_dropped = len(history) - len(packed)
+
+    return prompt
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from app.core.metrics import COALESCED_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# PER-USER SERIALIZATION + MESSAGE COALESCING
+# ─────────────────────────────────────────────
+# Users type like WhatsApp: "hi" / "hairfall ho raha" / "kaafi time se"
+# in three quick sends. Run independently, the three turns race each
+# other on the same conversation and cost three pipelines.
+#
+# - UserLocks: at most one turn per user runs at a time (both
+#   endpoints, within this process).
+# - Coalescer (POST /chat, CHAT_COALESCE): messages of one user that
+#   arrive within CHAT_COALESCE_WINDOW seconds of each other (or while
+#   that user's previous turn is still running) are answered by ONE
+#   pipeline run over the merged text. Each message is still stored as
+#   its own row.
+#
+# Response contract for a coalesced burst: only the LAST request gets
+# the reply; every earlier one gets {"reply": "", "coalesced": true}
+# and clients should render nothing for it.
+
+def coalesced_response() -> dict:
+    return {"reply": "", "coalesced": True}
+
+
+class UserLocks:
+    """
+    One asyncio.Lock per user, dropped again when nobody holds or
+    waits for it.
+    """
+    def __init__(self):
+        self._locks: dict = {}
+        self._users: Counter = Counter()
+
+    @asynccontextmanager
+    async def hold(self, user_id):
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        self._users[user_id] += 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[user_id] -= 1
+            if not self._users[user_id]:
+                del self._users[user_id]
+                del self._locks[user_id]
+
+
+@dataclass
+class _Batch:
+    messages: list[str] = field(default_factory=list)
+    waiters: list[asyncio.Future] = field(default_factory=list)
+    timer: asyncio.Task | None = None
+
+
+class Coalescer:
+    def __init__(self, run, window: float, locks: UserLocks):
+        # run(user_id, messages) -> response dict, one pipeline run
+        self.run = run
+        self.window = window
+        self.locks = locks
+        self._batches: dict = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, user_id, message: str) -> dict:
+        """
+        Adds `message` to the user's open batch and waits for its
+        response (see the contract above).
+        """
+        batch = self._batches.get(user_id)
+        if batch is None:
+            batch = self._batches[user_id] = _Batch()
+
+        waiter = asyncio.get_running_loop().create_future()
+        batch.messages.append(message)
+        batch.waiters.append(waiter)
+
+        # Debounce: the window restarts with every new message.
+        if batch.timer is not None:
+            batch.timer.cancel()
+        batch.timer = asyncio.create_task(self._flush_after(user_id, batch))
+        self._tasks.add(batch.timer)
+        batch.timer.add_done_callback(self._tasks.discard)
+
+        return await waiter
+
+    async def _flush_after(self, user_id, batch: _Batch):
+        await asyncio.sleep(self.window)
+
+        # The batch stays open while the user's previous turn still
+        # holds the lock: messages sent meanwhile join it (and restart
+        # this timer, which cancels the wait).
+        async with self.locks.hold(user_id):
+            # Messages from here on start the next batch.
+            if self._batches.get(user_id) is batch:
+                del self._batches[user_id]
+            await self._run(user_id, batch)
+
+    async def _run(self, user_id, batch: _Batch):
+        try:
+            response = await self.run(user_id, batch.messages)
+        except Exception as e:
+            logger.exception("coalesced turn failed (%d messages)", len(batch.messages))
+            for waiter in batch.waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+
+        *earlier, last = batch.waiters
+        for waiter in earlier:
+            if not waiter.done():
+                waiter.set_result(coalesced_response())
+        COALESCED_MESSAGES.inc(len(earlier))
+        if not last.done():
+            last.set_result(response)
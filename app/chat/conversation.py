@@ -0,0 +1,117 @@
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from app.core.cache import VersionedCache, shared_backend_from_url
+from app.core.config import settings
+from app.db.dialect import insert
+from app.db.models import Conversation
+
+
+# ─────────────────────────────────────────────
+# ACTIVE CONVERSATION (CACHED)
+# ─────────────────────────────────────────────
+# Every message starts by finding the user's active conversation.
+# The unique partial index uq_conversations_user_active guarantees
+# there is at most one, so user_id → conversation is cached here and
+# only changes when the summary moves (write-through below).
+
+@dataclass(frozen=True)
+class ConversationRecord:
+    """
+    Detached, read-only copy of the active Conversation row.
+    """
+    id: uuid.UUID
+    user_id: uuid.UUID
+    summary: str | None = None
+    summarized_until: datetime | None = None
+
+    @classmethod
+    def from_row(cls, convo: Conversation) -> "ConversationRecord":
+        return cls(convo.id, convo.user_id, convo.summary, convo.summarized_until)
+
+
+conversation_cache = VersionedCache(
+    "conversation",
+    maxsize=settings.CONVERSATION_CACHE_SIZE,
+    ttl=settings.CONVERSATION_CACHE_TTL,
+    shared=shared_backend_from_url(settings.CACHE_BACKEND_URL),
+)
+
+
+async def get_active_conversation(db, user_id) -> ConversationRecord:
+    """
+    Cached active conversation, created on the first message with
+    INSERT ... ON CONFLICT DO NOTHING against the partial unique index
+    (two concurrent first messages end up in the same conversation).
+    Does not commit.
+    """
+    key = str(user_id)
+    record, version = await conversation_cache.get(key)
+    if record is not None:
+        return record
+
+    convo = await db.scalar(
+        select(Conversation)
+        .filter_by(user_id=user_id, is_active=True)
+        .limit(1)
+    )
+    if convo:
+        record = ConversationRecord.from_row(convo)
+        conversation_cache.set(key, record, version)
+        return record
+
+    convo_id = await db.scalar(
+        insert(db, Conversation)
+        .values(id=uuid.uuid4(), user_id=user_id, is_active=True)
+        .on_conflict_do_nothing(
+            index_elements=[Conversation.user_id],
+            index_where=Conversation.is_active,
+        )
+        .returning(Conversation.id)
+    )
+    if convo_id:
+        # Not cached until it is committed; the next message caches it.
+        return ConversationRecord(convo_id, user_id)
+
+    # Lost the race: the other request's row is there now.
+    convo = await db.scalar(
+        select(Conversation)
+        .filter_by(user_id=user_id, is_active=True)
+        .limit(1)
+    )
+    return ConversationRecord.from_row(convo)
+
+
+async def save_summary(db, before: ConversationRecord, after: ConversationRecord) -> bool:
+    """
+    Writes a moved summary watermark. Does not commit; returns False
+    without a statement when nothing changed.
+
+    Optimistic: the row is only updated while its watermark is still
+    the one `before` was computed from, so a concurrent refresh is
+    never overwritten with an older one (False when it lost).
+    """
+    if after == before:
+        return False
+
+    watermark = Conversation.summarized_until
+    result = await db.execute(
+        update(Conversation)
+        .where(
+            Conversation.id == after.id,
+            watermark.is_(None) if before.summarized_until is None
+            else watermark == before.summarized_until,
+        )
+        .values(summary=after.summary, summarized_until=after.summarized_until)
+    )
+    return result.rowcount == 1
+
+
+async def publish_conversation(record: ConversationRecord):
+    """
+    Write-through after the caller committed `save_summary`.
+    """
+    await conversation_cache.put(str(record.user_id), record)
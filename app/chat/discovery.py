@@ -0,0 +1,179 @@
+import random
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.persona.requirements import order_by_requirements
+
+
+# ─────────────────────────────────────────────
+# TEMPLATE DISCOVERY REPLIES
+# ─────────────────────────────────────────────
+# A DISCOVERY turn only acknowledges the user and asks for 1-2 missing
+# persona fields, so it does not need the main model. The reply is
+# assembled from the banks below in the same WhatsApp shape the LLM is
+# asked for (reaction, lead-in, questions; one bubble per line), with
+# a random pick per line so consecutive turns do not read the same.
+#
+# DISCOVERY_MODE=llm (or a field without questions) keeps the LLM path.
+
+REACTIONS = [
+    "Hmmm",
+    "Achha",
+    "Theek hai",
+    "Samajh aaya",
+    "Achha, samajh aaya.",
+    "Hmmm, theek hai.",
+]
+
+# Second line, per intent (before the questions)
+LEAD_INS = {
+    "diet": [
+        "Diet plan batane se pehle thoda tumhare baare me jaan lu.",
+        "Sahi diet suggest karne ke liye thoda context chahiye.",
+        "Khane ka plan tumhare hisaab se banana hai, to pehle kuch basic cheezein.",
+    ],
+    "fitness": [
+        "Workout plan se pehle thoda tumhare baare me samajh lu.",
+        "Sahi routine batane ke liye kuch cheezein jaanni hai.",
+        "Tumhare level ke hisaab se plan banana hai, to pehle thoda batao.",
+    ],
+    "skin": [
+        "Skincare tumhari skin ke hisaab se honi chahiye.",
+        "Sahi routine batane se pehle thoda samajh lu.",
+    ],
+    "hair": [
+        "Hairfall ke kaafi reasons ho sakte hai, to pehle thoda samajh lu.",
+        "Sahi cheez batane ke liye thoda aur context chahiye.",
+    ],
+}
+DEFAULT_LEAD_INS = [
+    "Pehle thoda tumhare baare me samajh lu.",
+    "Bas kuch cheezein aur jaan lu.",
+]
+
+FIELD_QUESTIONS = {
+    "age": [
+        "Tumhari age kitni hai?",
+        "Age kya hai tumhari?",
+        "Pehle ye batao, umar kitni hai?",
+    ],
+    "goal": [
+        "Goal kya hai tumhara?",
+        "Main goal kya hai abhi?",
+    ],
+    "diet_type": [
+        "Veg ho, non-veg ya eggetarian?",
+        "Khane me veg, non-veg ya egg, kya chalta hai?",
+        "Diet veg hai ya non-veg bhi khate ho?",
+    ],
+    "activity_level": [
+        "Din bhar ka routine kaisa hai, desk job ya zyada chalna-phirna?",
+        "Daily activity kaisi hai, zyada baithna hota hai ya active rehte ho?",
+    ],
+    "height_cm": [
+        "Height aur weight kitna hai?",
+        "Height aur weight bata do approx.",
+    ],
+    "weight_kg": [
+        "Weight kitna hai abhi?",
+        "Abhi weight kitna chal raha hai?",
+    ],
+    "gender": [
+        "Male ho ya female?",
+    ],
+    "skin_type": [
+        "Skin type kya hai, oily, dry, combination ya sensitive?",
+        "Skin zyada oily rehti hai, dry ya mixed?",
+    ],
+    "hair_type": [
+        "Baal straight hai, wavy ya curly?",
+    ],
+    "scalp_condition": [
+        "Scalp kaisa rehta hai, oily, dry ya itchy?",
+    ],
+    "dandruff": [
+        "Dandruff hai kya?",
+        "Dandruff ki problem hai ya nahi?",
+    ],
+    "stress_level": [
+        "Stress level kaisa hai aajkal, low, medium ya high?",
+        "Aajkal stress kitna rehta hai?",
+    ],
+    "hairfall_duration": [
+        "Hairfall kab se ho raha hai?",
+        "Kitne time se baal zyada gir rahe hai?",
+    ],
+    "training_days_per_week": [
+        "Hafte me kitne din workout karte ho?",
+    ],
+}
+
+# Wording that depends on the intent as well as the field
+INTENT_FIELD_QUESTIONS = {
+    ("diet", "goal"): [
+        "Goal kya hai, fat loss, weight gain ya bas healthy khana?",
+        "Weight kam karna hai, badhana hai ya bas healthy rehna hai?",
+    ],
+    ("fitness", "goal"): [
+        "Goal kya hai, fat loss, muscle gain ya stamina?",
+        "Fitness me main focus kya hai, fat loss, muscle ya stamina?",
+    ],
+    ("fitness", "activity_level"): [
+        "Abhi kitna active ho, koi workout karte ho ya bilkul start karna hai?",
+    ],
+}
+
+_rng = random.Random()
+
+# Fields the last DISCOVERY turn asked each user for (in-process). The
+# next message may be a bare answer ("high", "haan") that only makes
+# sense against that question; see persona.service.FIELD_ANSWERS.
+_asked = TTLCache(maxsize=settings.DISCOVERY_ASKED_CACHE_SIZE, ttl=settings.DISCOVERY_ASKED_TTL)
+
+
+def remember_asked(user_id, fields: list[str]):
+    if fields:
+        _asked.set(str(user_id), list(fields))
+    else:
+        _asked.pop(str(user_id))
+
+
+def asked_fields(user_id) -> list[str]:
+    return _asked.get(str(user_id), [])
+
+
+def questions_for(intent: str, field: str) -> list[str]:
+    return INTENT_FIELD_QUESTIONS.get((intent, field)) or FIELD_QUESTIONS.get(field, [])
+
+
+def can_answer(intent: str, missing_fields: list[str]) -> bool:
+    """
+    True when a DISCOVERY turn for these fields is answered from the
+    templates instead of the main model.
+    """
+    return (
+        settings.DISCOVERY_MODE == "template"
+        and bool(missing_fields)
+        and all(questions_for(intent, f) for f in missing_fields)
+    )
+
+
+def discovery_reply(intent: str, missing_fields: list[str], rng: random.Random | None = None) -> str | None:
+    """
+    Reaction, lead-in and one question per missing field (most
+    important first), one bubble per line. None when the LLM has to
+    answer (see can_answer).
+    """
+    if not can_answer(intent, missing_fields):
+        return None
+
+    rng = rng or _rng
+    questions = " ".join(
+        rng.choice(questions_for(intent, f))
+        for f in order_by_requirements(intent, missing_fields)
+    )
+    return "\n".join([
+        rng.choice(REACTIONS),
+        rng.choice(LEAD_INS.get(intent, DEFAULT_LEAD_INS)),
+        questions,
+    ])
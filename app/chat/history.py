@@ -0,0 +1,45 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import Message
+
+
+# ─────────────────────────────────────────────
+# BOUNDED HISTORY LOADING
+# ─────────────────────────────────────────────
+
+def history_window() -> int:
+    """
+    How many rows a turn ever needs: one more than the summary trigger,
+    which is enough to tell whether a summary refresh is due.
+    """
+    return settings.SUMMARY_TRIGGER_MESSAGES + 1
+
+
+async def load_history(db: AsyncSession, conversation_id, after=None, limit: int | None = None):
+    """
+    Returns the newest `limit` messages of a conversation that come
+    after the summary watermark `after`, oldest first.
+
+    Only the columns the prompt and the summarizer need are loaded
+    (role, content, created_at) and the query walks the
+    (conversation_id, created_at) index backwards, so the cost per turn
+    does not depend on how long the conversation is.
+
+    If the backlog past the watermark is longer than the window (e.g.
+    conversations from before the watermark existed), the older part is
+    simply not loaded; the stored summary already covers it.
+    """
+    query = (
+        select(Message.role, Message.content, Message.created_at)
+        .where(Message.conversation_id == conversation_id)
+        .order_by(Message.created_at.desc())
+        .limit(limit or history_window())
+    )
+    if after is not None:
+        query = query.where(Message.created_at > after)
+
+    rows = (await db.execute(query)).all()
+    rows.reverse()
+    return rows
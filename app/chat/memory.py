@@ -1,9 +1,29 @@
-from app.core.openai_client import chat_completion
+from dataclasses import replace
 
-def summarize_messages(messages):
+from app.core.config import settings
+from app.core.openai_client import async_chat_completion
+from app.chat.assembler import count_tokens
+
+async def summarize_messages(messages, previous_summary: str | None = None):
     text = "\n".join([f"{m.role}: {m.content}" for m in messages])
 
-    prompt = f"""
+    if previous_summary:
+        prompt = f"""
+Update these memory notes with the new part of the conversation,
+so they help continue the conversation naturally.
+
+Keep everything from the existing notes that is still true.
+Keep it factual, neutral, and compact.
+Do not include advice.
+
+Existing notes:
+{previous_summary}
+
+New conversation:
+{text}
+"""
+    else:
+        prompt = f"""
 Summarize this conversation into short memory notes
 that help continue the conversation naturally.
 
@@ -14,9 +34,52 @@ Conversation:
 {text}
 """
 
-    summary = chat_completion([
+    summary = await async_chat_completion([
         {"role": "system", "content": "You create compact conversation memory."},
         {"role": "user", "content": prompt}
-    ])
+    ], purpose="summarize")
 
     return summary.strip() if summary else ""
+
+
+def _count_tokens(messages) -> int:
+    return sum(count_tokens(m.content) for m in messages)
+
+
+def summary_due(unsummarized) -> bool:
+    """
+    A refresh is due once there are more than SUMMARY_TRIGGER_MESSAGES
+    messages past the watermark, or once the part that no longer fits
+    in the recent window is large enough on its own.
+    """
+    if len(unsummarized) > settings.SUMMARY_TRIGGER_MESSAGES:
+        return True
+
+    overflow = unsummarized[:-settings.SUMMARY_KEEP_RECENT]
+    return bool(overflow) and _count_tokens(overflow) >= settings.SUMMARY_TRIGGER_TOKENS
+
+
+async def refresh_summary(convo, unsummarized):
+    """
+    Rolling conversation memory.
+
+    `unsummarized` are the messages after convo.summarized_until,
+    oldest first. When a refresh is due, everything except the most
+    recent SUMMARY_KEEP_RECENT messages is folded into the existing
+    summary and the watermark moves to the last folded message.
+
+    Returns (conversation, messages that still have to be sent
+    verbatim). The conversation record is replaced, never mutated;
+    the caller saves it.
+    """
+    if not summary_due(unsummarized):
+        return convo, unsummarized
+
+    overflow = unsummarized[:-settings.SUMMARY_KEEP_RECENT]
+    summary = await summarize_messages(overflow, previous_summary=convo.summary)
+    if not summary:
+        return convo, unsummarized
+
+    convo = replace(convo, summary=summary, summarized_until=overflow[-1].created_at)
+
+    return convo, unsummarized[-settings.SUMMARY_KEEP_RECENT:]
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+
+from app.chat.analysis import INTENT_FALLBACK, MessageAnalysis, analyze_combined, plan_analysis
+from app.core.config import settings
+from app.guardrails.service import classify_intent_with_llm
+from app.persona.service import EXTRACTABLE_FIELDS, extract_persona_with_llm
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# PRE-PROCESSING FAN-OUT
+# ─────────────────────────────────────────────
+# Persona extraction and intent classification only depend on the
+# user message, so whatever LLM calls the message analysis needs (see
+# app/chat/analysis.py) are started first and the route collects them
+# once it is done with its own DB work.
+
+# Used when a stage times out or fails. They match what each stage
+# returns for an empty / unparsable LLM response.
+PERSONA_FALLBACK: dict = {}
+
+
+async def _run_stage(stage: str, coro, timeout: float, fallback):
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError:
+        # We stop waiting; a cached sub-task still finishes in the
+        # background and fills the response cache for the next message.
+        logger.warning("%s timed out after %.1fs, using fallback", stage, timeout)
+    except Exception:
+        logger.exception("%s failed, using fallback", stage)
+
+    return fallback
+
+
+async def _resolved(value):
+    return value
+
+
+class Preprocessing:
+    """
+    Handle on the in-flight pre-processing stages of one chat turn.
+    Timeouts start counting as soon as the stages are created.
+
+    Separate calls are separate stages with their own timeout and
+    fallback: a slow extraction never costs the intent the classifier
+    already returned. Only the combined call shares one timeout.
+    """
+
+    def __init__(
+        self,
+        user_message: str,
+        persona_fields: list[str] | None = None,
+        asked_fields: list[str] | None = None,
+    ):
+        fields = EXTRACTABLE_FIELDS if persona_fields is None else persona_fields
+        local, path = plan_analysis(user_message, fields, asked_fields=asked_fields)
+
+        if path == "combined":
+            analysis = asyncio.create_task(_run_stage(
+                "message_analysis",
+                analyze_combined(user_message, fields),
+                max(settings.PERSONA_EXTRACTION_TIMEOUT, settings.INTENT_CLASSIFICATION_TIMEOUT),
+                MessageAnalysis(INTENT_FALLBACK, PERSONA_FALLBACK),
+            ))
+            self._intent = asyncio.create_task(_field(analysis, "intent"))
+            self._persona = asyncio.create_task(_field(analysis, "persona"))
+            return
+
+        if path in ("classify", "separate"):
+            self._intent = asyncio.create_task(_run_stage(
+                "intent_classification",
+                classify_intent_with_llm(user_message),
+                settings.INTENT_CLASSIFICATION_TIMEOUT,
+                INTENT_FALLBACK,
+            ))
+        else:
+            self._intent = asyncio.create_task(_resolved(local))
+
+        if path in ("extract", "separate"):
+            self._persona = asyncio.create_task(_run_stage(
+                "persona_extraction",
+                extract_persona_with_llm(user_message, fields),
+                settings.PERSONA_EXTRACTION_TIMEOUT,
+                PERSONA_FALLBACK,
+            ))
+        else:
+            self._persona = asyncio.create_task(_resolved(PERSONA_FALLBACK))
+
+    def done(self) -> bool:
+        return self._intent.done() and self._persona.done()
+
+    async def persona(self) -> dict:
+        return await self._persona
+
+    async def intent(self) -> str:
+        return await self._intent
+
+
+async def _field(analysis: asyncio.Task, name: str):
+    return getattr(await analysis, name)
+
+
+def start_preprocessing(
+    user_message: str,
+    persona_fields: list[str] | None = None,
+    asked_fields: list[str] | None = None,
+) -> Preprocessing:
+    """
+    `persona_fields` are the persona fields still missing; extraction is
+    skipped entirely once there are none. `asked_fields` are the ones
+    the previous turn asked for.
+    """
+    return Preprocessing(user_message, persona_fields, asked_fields)
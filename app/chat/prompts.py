@@ -1,4 +1,6 @@
+import json
 import random
+from functools import lru_cache
 
 def system_guardrails_prompt():
     return """
@@ -73,25 +75,91 @@ JUST FOLLOW IT.
 """
 
 
-def persona_prompt(persona):
+def mode_rules_prompt():
+    return """
+Rules:
+- If in DISCOVERY mode:
+  • Do NOT give final advice.
+  • Start with 1–2 short human reactions (each on new line).
+  • Ask ONLY the missing fields naturally.
+- If in ADVICE mode:
+  • Start with 1–2 WhatsApp-style reactions (new lines).
+  • Then give ONE confident, complete answer.
+- Language: simple, respectful Hinglish (badhia, achha, shi, hmmm, thoda).
+- Sound like a real human on WhatsApp.
+"""
+
+
+def persona_prompt(persona: dict):
     if not persona:
         return ""
 
     details = []
-    if getattr(persona, 'age', None):
-        details.append(f"Age: {persona.age}")
-    if persona.goal:
-        details.append(f"Goal: {persona.goal}")
-    if persona.diet_type:
-        details.append(f"Diet: {persona.diet_type}")
-    if persona.activity_level:
-        details.append(f"Activity: {persona.activity_level}")
-    if getattr(persona, 'height_cm', None):
-        details.append(f"Height: {persona.height_cm} cm")
-    if getattr(persona, 'weight_kg', None):
-        details.append(f"Weight: {persona.weight_kg} kg")
+    if persona.get("age"):
+        details.append(f"Age: {persona['age']}")
+    if persona.get("goal"):
+        details.append(f"Goal: {persona['goal']}")
+    if persona.get("diet_type"):
+        details.append(f"Diet: {persona['diet_type']}")
+    if persona.get("activity_level"):
+        details.append(f"Activity: {persona['activity_level']}")
+    if persona.get("height_cm"):
+        details.append(f"Height: {persona['height_cm']} cm")
+    if persona.get("weight_kg"):
+        details.append(f"Weight: {persona['weight_kg']} kg")
 
     return (
         "Known user context (use carefully, do NOT assume beyond this):\n"
         + ", ".join(details)
     )
+
+
+# ─────────────────────────────────────────────
+# PRECOMPILED PROMPTS
+# ─────────────────────────────────────────────
+# Everything that does not depend on the user is joined once at import
+# and always sent as the first message, so the prompt prefix is
+# byte-identical across users and turns (provider-side prompt caching
+# only hits on an exact prefix match).
+
+STATIC_SYSTEM_PROMPT = "\n".join([
+    system_guardrails_prompt(),
+    tone_prompt(),
+    mode_rules_prompt(),
+])
+
+
+def _render_persona_fragment(persona: dict) -> str:
+    return "\n".join(filter(None, [
+        persona_prompt(persona),
+        f"Known persona:\n{json.dumps(persona, indent=2, sort_keys=True, default=str)}",
+    ]))
+
+
+@lru_cache(maxsize=4096)
+def _cached_persona_fragment(key: tuple) -> str:
+    return _render_persona_fragment(dict(key))
+
+
+def persona_fragment(persona: dict) -> str:
+    """
+    Persona part of the per-turn context, memoized on the persona
+    contents: most turns of a user see the exact same persona.
+    """
+    try:
+        key = tuple(sorted(persona.items()))
+        return _cached_persona_fragment(key)
+    except TypeError:
+        # Unhashable values (lists/dicts from misc_persona)
+        return _render_persona_fragment(persona)
+
+
+def turn_context_prompt(persona: dict, persona_ready: bool, missing_fields: list[str]) -> str:
+    """
+    The user-specific system message that follows STATIC_SYSTEM_PROMPT.
+    """
+    return (
+        f"Conversation mode: {'ADVICE' if persona_ready else 'DISCOVERY'}\n"
+        f"{persona_fragment(persona)}\n\n"
+        f"Missing fields to ask now (MAX 2): {missing_fields or 'None'}\n"
+    )
@@ -1,61 +1,63 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-import json
+from dataclasses import dataclass
+import logging
+import time
+import uuid
 
-from app.db.session import get_db
-from app.db.models import Conversation, Message, Persona
+from app.db.session import AsyncSessionLocal, get_async_db
+from app.db.models import Message
 
-from app.guardrails.service import classify_intent
-from app.guardrails.logger import log_violation
+from app.core.config import settings
+from app.core.metrics import STAGE_SECONDS, TURNS, stage
+from app.guardrails.logger import record_violation
+from app.guardrails.prescreen import prescreen
 
+from app.persona.requirements import order_by_requirements
 from app.chat.prompts import (
-    system_guardrails_prompt,
-    tone_prompt,
-    persona_prompt,
+    STATIC_SYSTEM_PROMPT,
+    turn_context_prompt,
 )
 
 from app.persona.service import (
-    extract_persona_from_message,
+    PersonaRecord,
+    load_persona,
+    missing_persona_fields,
+    publish_persona,
+    save_persona,
     update_persona,
 )
 
-from app.core.openai_client import chat_completion
-from app.chat.memory import summarize_messages
+from app.core.openai_client import async_chat_completion, stream_chat_completion
+from app.chat.conversation import (
+    ConversationRecord,
+    get_active_conversation,
+    publish_conversation,
+    save_summary,
+)
+from app.chat.summarizer import update_summary
+from app.chat.history import load_history
+from app.chat.assembler import assemble_prompt
+from app.chat.analysis import provisional_intent
+from app.chat.coalesce import Coalescer, UserLocks
+from app.chat.discovery import asked_fields, can_answer, discovery_reply, remember_asked
+from app.chat.pipeline import start_preprocessing
+from app.chat.speculation import Speculation
+from app.chat.streaming import BubbleSplitter, ndjson_event, split_bubbles
+
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
 class ChatRequest(BaseModel):
-    user_id: str
+    user_id: uuid.UUID
     message: str
 
 
-# ─────────────────────────────────────────────
-# PERSONA SNAPSHOT
-# ─────────────────────────────────────────────
-
-def get_persona_state(persona: Persona) -> dict:
-    if not persona:
-        return {}
-
-    state = {
-        "age": getattr(persona, "age", None),
-        "goal": persona.goal,
-        "diet_type": persona.diet_type,
-        "activity_level": persona.activity_level,
-        "gender": getattr(persona, "gender", None),
-        "height_cm": getattr(persona, "height_cm", None),
-        "weight_kg": getattr(persona, "weight_kg", None),
-    }
-
-    if persona.misc_persona:
-        state.update(persona.misc_persona)
-
-    return state
-
-
 # ─────────────────────────────────────────────
 # PERSONA READINESS GATE (CRITICAL)
 # ─────────────────────────────────────────────
@@ -91,7 +93,8 @@ def is_persona_ready(intent: str, persona: dict) -> bool:
 
 def get_next_missing_fields(intent: str, persona: dict) -> list[str]:
     """
-    Ask MAX 2 fields per turn.
+    Ask MAX 2 fields per turn, most important first
+    (REQUIRED_PERSONA_FIELDS order).
     """
     intent = intent or ""
     fields = []
@@ -106,144 +109,400 @@ def get_next_missing_fields(intent: str, persona: dict) -> list[str]:
         fields = ["age", "stress_level", "hairfall_duration"]
 
     missing = [f for f in fields if not persona.get(f)]
-    return missing[:2]
+    return order_by_requirements(intent, missing)[:2]
 
 
 # ─────────────────────────────────────────────
-# MAIN CHAT ENDPOINT
+# GUARDRAIL REPLIES
 # ─────────────────────────────────────────────
 
-@router.post("/")
-def chat(payload: ChatRequest, db: Session = Depends(get_db)):
+GUARDRAIL_REPLIES = {
+    "sexual": "Is topic pe main help nahi kar paungi.",
+    "harmful": "Is topic pe main help nahi kar paungi.",
+    "medical": (
+        "Hmm\n"
+        "Samajh aa raha hai.\n"
+        "Ye thoda medical concern lagta hai. Doctor se consult karna best rahega."
+    ),
+}
+
+
+# ─────────────────────────────────────────────
+# TURN PIPELINE (shared by /chat and /chat/stream)
+# ─────────────────────────────────────────────
+
+@dataclass
+class PreparedTurn:
+    conversation_id: uuid.UUID
+    # Set when the turn is already answered without the main LLM
+    # (guardrail replies); nothing is left to persist in that case.
+    reply: str | None = None
+    # Template DISCOVERY reply: no main LLM call, saved like one
+    local_reply: str | None = None
+    prompt_messages: list[dict] | None = None
+    purpose: str = "advice"  # "discovery" while persona details are missing
+    # Pending writes (before, after). Executed right before the reply's
+    # commit, so no transaction is open during the main completion;
+    # the new records are published to the caches once it commits.
+    persona: tuple[PersonaRecord, PersonaRecord] | None = None
+    conversation: tuple[ConversationRecord, ConversationRecord] | None = None
+    # Main completion already running for exactly this prompt
+    speculation: Speculation | None = None
+
+
+def gating_intent(intent: str, user_message: str) -> str:
+    # Special mapping: hairfall → hair
+    lower = user_message.lower()
+    if intent == "lifestyle" and any(w in lower for w in ["hairfall", "hair fall", "hair loss"]):
+        return "hair"
+    return intent
+
+
+def persona_gate(intent: str, persona_state: dict) -> tuple[bool, list[str]]:
+    """
+    (persona ready, fields to ask for now).
+    """
+    persona_ready = is_persona_ready(intent, persona_state)
+    missing_fields = get_next_missing_fields(intent, persona_state) if not persona_ready else []
+    return persona_ready, missing_fields
+
+
+def build_prompt(intent: str, persona_state: dict, convo: ConversationRecord, history):
+    """
+    Persona gating + prompt assembly. Returns (prompt, purpose).
+    """
+    # 5️⃣ Persona gating
+    persona_ready, missing_fields = persona_gate(intent, persona_state)
+
+    # 6️⃣ PROMPT (LLM-FIRST, CONTROLLED)
+    # Static prefix first (identical for every user), then the
+    # user-specific context, memory and history.
+    prompt = assemble_prompt(
+        sections=[
+            ("system", STATIC_SYSTEM_PROMPT),
+            ("context", turn_context_prompt(persona_state, persona_ready, missing_fields)),
+            ("summary", f"Conversation memory:\n{convo.summary}" if convo.summary else ""),
+        ],
+        history=history,
+    )
+    return prompt, "advice" if persona_ready else "discovery"
+
+
+async def add_user_messages(db: AsyncSession, conversation_id, parts: list[str]):
+    """
+    One row per user message. The messages of a coalesced burst are
+    committed one by one: created_at is the transaction time, and the
+    history must keep them in order. Does not commit the last one.
+    """
+    for i, part in enumerate(parts):
+        if i:
+            await db.commit()
+        db.add(Message(
+            conversation_id=conversation_id,
+            role="user",
+            content=part,
+        ))
+    await db.flush()
+
+
+async def blocked_turn(db: AsyncSession, user_id, parts: list[str], intent: str) -> PreparedTurn:
+    """
+    Pre-screen hit: store the message and the violation in one
+    transaction and answer with the canned reply. No persona work,
+    no LLM call.
+    """
+    convo = await get_active_conversation(db, user_id)
+    await add_user_messages(db, convo.id, parts)
+    await record_violation(db, user_id, convo.id, intent)
+    await db.commit()
+
+    return PreparedTurn(convo.id, reply=GUARDRAIL_REPLIES[intent])
+
+
+async def prepare_turn(
+    payload: ChatRequest,
+    db: AsyncSession,
+    speculate: bool = False,
+    parts: list[str] | None = None,
+) -> PreparedTurn:
+    """
+    Everything up to (not including) the main completion. With
+    `speculate` (and SPECULATIVE_REPLY) the completion may already be
+    running: see app/chat/speculation.py.
+
+    `parts`: the separate messages of a coalesced burst (stored one row
+    each); `payload.message` is then their merged text.
+    """
     user_id = payload.user_id
     user_message = payload.message.strip()
+    parts = parts or [user_message]
+
+    # 0️⃣ Guardrail pre-screen: clear violations are answered before
+    # any persona or LLM work; ambiguous ones go to the classifier.
+    if settings.GUARDRAIL_PRESCREEN:
+        with stage("prescreen"):
+            screen = prescreen(user_message)
+        if screen.blocked:
+            TURNS.inc(outcome="prescreen_blocked")
+            with stage("save"):
+                return await blocked_turn(db, user_id, parts, screen.intent)
+
+    # ── Transaction 1: persona/conversation, user message, history ──
+    # Committed BEFORE waiting on any LLM call, so no connection sits
+    # idle in a transaction while the model is thinking.
+
+    # 1️⃣ Persona (loaded first: extraction only asks for missing fields)
+    with stage("persona_load"):
+        persona = await load_persona(db, user_id)
+
+    # Persona extraction + intent classification run in the background
+    # while we do the DB work below.
+    preprocessing = start_preprocessing(
+        user_message,
+        persona_fields=missing_persona_fields(persona.state()),
+        asked_fields=asked_fields(user_id),
+    )
 
-    # 1️⃣ Conversation
-    convo = (
-        db.query(Conversation)
-        .filter_by(user_id=user_id, is_active=True)
-        .first()
+    # 2️⃣ Conversation
+    with stage("conversation"):
+        convo = await get_active_conversation(db, user_id)
+        # flushed: the history query below must see it
+        await add_user_messages(db, convo.id, parts)
+
+    # 3️⃣ Memory
+    # Only the tail after the summary watermark; older messages
+    # already live in convo.summary.
+    with stage("history"):
+        messages = await load_history(db, convo.id, after=convo.summarized_until)
+        await db.commit()
+
+    # Speculative main completion from the provisional intent, while
+    # the analysis below is still running.
+    speculation = None
+    if speculate and settings.SPECULATIVE_REPLY and not preprocessing.done():
+        guess = provisional_intent(user_message)
+        if guess is not None:
+            guess = gating_intent(guess, user_message)
+            ready, missing_fields = persona_gate(guess, persona.state())
+            # A template DISCOVERY turn needs no main completion at all.
+            if ready or not can_answer(guess, missing_fields):
+                with stage("speculation"):
+                    prompt, purpose = build_prompt(guess, persona.state(), convo, messages)
+                    speculation = Speculation(prompt, purpose)
+
+    # ── LLM pre-processing ──
+    # (the wait stages are what is left of each call after the DB work)
+    with stage("extraction_wait"):
+        extracted = await preprocessing.persona()
+    updated = update_persona(persona, extracted)
+    # Written with the reply (or the violation), not now: that would
+    # open a transaction and hold the row lock through the LLM calls.
+    persona_write = (persona, updated) if updated is not persona else None
+
+    persona_state = updated.state()
+
+    # 4️⃣ Intent (SAFETY ONLY)
+    with stage("classification_wait"):
+        intent = await preprocessing.intent()
+
+    if intent in GUARDRAIL_REPLIES:
+        if speculation is not None:
+            speculation.discard("blocked")
+        TURNS.inc(outcome="blocked")
+        turn = PreparedTurn(convo.id, reply=GUARDRAIL_REPLIES[intent], persona=persona_write)
+        with stage("save"):
+            await record_violation(db, user_id, convo.id, intent)
+            await commit_turn(db, turn)
+        return turn
+
+    intent = gating_intent(intent, user_message)
+
+    # Folding overflow into the summary happens in the background; this
+    # turn uses the stored one. (Inline fallback: convo changes and is
+    # written together with the reply below.)
+    with stage("summary"):
+        summarized, messages = await update_summary(convo, messages)
+    summary_write = (convo, summarized) if summarized != convo else None
+    convo = summarized
+
+    # DISCOVERY turns are answered from the question templates
+    # (DISCOVERY_MODE=template), without the main LLM.
+    persona_ready, missing_fields = persona_gate(intent, persona_state)
+    # Template or LLM, a DISCOVERY reply asks for exactly these
+    remember_asked(user_id, missing_fields)
+    reply = None if persona_ready else discovery_reply(intent, missing_fields)
+    if reply is not None:
+        if speculation is not None:
+            speculation.discard("local")
+        return PreparedTurn(
+            convo.id,
+            local_reply=reply,
+            purpose="discovery",
+            persona=persona_write,
+            conversation=summary_write,
+        )
+
+    with stage("assemble"):
+        prompt, purpose = build_prompt(intent, persona_state, convo, messages)
+
+    if speculation is not None and not speculation.matches(prompt, purpose):
+        speculation.discard("changed")
+        speculation = None
+
+    logger.debug(
+        "prompt tokens=%d breakdown=%s history included=%d dropped=%d truncated=%d",
+        prompt.total_tokens,
+        prompt.breakdown,
+        prompt.history_included,
+        prompt.history_dropped,
+        prompt.history_truncated,
     )
 
-    if not convo:
-        convo = Conversation(user_id=user_id)
-        db.add(convo)
-        db.commit()
-        db.refresh(convo)
-
-    db.add(Message(
-        conversation_id=convo.id,
-        role="user",
-        content=user_message,
-    ))
-    db.commit()
-
-    # 2️⃣ Persona
-    persona = (
-        db.query(Persona)
-        .filter_by(user_id=user_id)
-        .first()
+    return PreparedTurn(
+        convo.id,
+        prompt_messages=prompt.messages,
+        purpose=purpose,
+        persona=persona_write,
+        conversation=summary_write,
+        speculation=speculation,
     )
 
-    if not persona:
-        persona = Persona(user_id=user_id, misc_persona={})
-        db.add(persona)
-        db.commit()
-        db.refresh(persona)
 
-    extracted = extract_persona_from_message(user_message)
-    if extracted:
-        update_persona(db, persona, extracted)
+async def commit_turn(db: AsyncSession, turn: PreparedTurn):
+    """
+    Runs the turn's pending persona / summary writes, commits, then
+    publishes whatever was actually written.
+    """
+    persona_written = await save_persona(db, *turn.persona) if turn.persona is not None else None
+    # False as well when a concurrent refresh moved the watermark first
+    summary_written = turn.conversation is not None and await save_summary(db, *turn.conversation)
+    await db.commit()
 
-    persona_state = get_persona_state(persona)
+    if persona_written is not None:
+        await publish_persona(persona_written)
+    if summary_written:
+        await publish_conversation(turn.conversation[1])
 
-    # 3️⃣ Intent (SAFETY ONLY)
-    intent = classify_intent(user_message)
 
-    if intent in {"sexual", "harmful"}:
-        log_violation(db, user_id, convo.id, intent)
-        return {"reply": "Is topic pe main help nahi kar paungi."}
+async def save_reply(db: AsyncSession, turn: PreparedTurn, reply: str):
+    # ── Transaction 2: persona/summary changes + assistant reply ──
+    with stage("save"):
+        db.add(Message(
+            conversation_id=turn.conversation_id,
+            role="assistant",
+            content=reply,
+        ))
+        await commit_turn(db, turn)
 
-    if intent == "medical":
-        log_violation(db, user_id, convo.id, intent)
-        return {
-            "reply": (
-                "Hmm\n"
-                "Samajh aa raha hai.\n"
-                "Ye thoda medical concern lagta hai. Doctor se consult karna best rahega."
-            )
-        }
 
-    # Special mapping: hairfall → hair
-    lower = user_message.lower()
-    if intent == "lifestyle" and any(w in lower for w in ["hairfall", "hair fall", "hair loss"]):
-        intent = "hair"
-
-    # 4️⃣ Memory
-    messages = (
-        db.query(Message)
-        .filter_by(conversation_id=convo.id)
-        .order_by(Message.created_at)
-        .all()
-    )
+# ─────────────────────────────────────────────
+# MAIN CHAT ENDPOINT
+# ─────────────────────────────────────────────
 
-    if len(messages) > 40:
-        summary = summarize_messages(messages[:-30])
-        if summary:
-            convo.summary = summary
-            db.commit()
-        messages = messages[-30:]
+user_locks = UserLocks()
 
-    # 5️⃣ Persona gating
-    persona_ready = is_persona_ready(intent, persona_state)
-    missing_fields = get_next_missing_fields(intent, persona_state) if not persona_ready else []
 
-    # 6️⃣ PROMPT (LLM-FIRST, CONTROLLED)
-    system_content = "\n".join(filter(None, [
-        system_guardrails_prompt(),
-        tone_prompt(),
-        persona_prompt(persona),
-    ]))
-
-    prompt_messages = [
-        {"role": "system", "content": system_content},
-        {
-            "role": "system",
-            "content": (
-                f"Conversation mode: {'ADVICE' if persona_ready else 'DISCOVERY'}\n"
-                f"Known persona:\n{json.dumps(persona_state, indent=2)}\n\n"
-                f"Missing fields to ask now (MAX 2): {missing_fields or 'None'}\n\n"
-                "Rules:\n"
-                "- If in DISCOVERY mode:\n"
-                "  • Do NOT give final advice.\n"
-                "  • Start with 1–2 short human reactions (each on new line).\n"
-                "  • Ask ONLY the missing fields naturally.\n"
-                "- If in ADVICE mode:\n"
-                "  • Start with 1–2 WhatsApp-style reactions (new lines).\n"
-                "  • Then give ONE confident, complete answer.\n"
-                "- Language: simple, respectful Hinglish (badhia, achha, shi, hmmm, thoda).\n"
-                "- Sound like a real human on WhatsApp.\n"
-            )
-        }
-    ]
-
-    if convo.summary:
-        prompt_messages.append({
-            "role": "system",
-            "content": f"Conversation memory:\n{convo.summary}"
-        })
-
-    for m in messages:
-        prompt_messages.append({"role": m.role, "content": m.content})
+async def run_chat_turn(payload: ChatRequest, db: AsyncSession, parts: list[str] | None = None) -> dict:
+    turn = await prepare_turn(payload, db, speculate=True, parts=parts)
+    if turn.reply is not None:
+        return {"reply": turn.reply}
 
     # 7️⃣ LLM CALL
-    reply = chat_completion(prompt_messages)
-
-    db.add(Message(
-        conversation_id=convo.id,
-        role="assistant",
-        content=reply,
-    ))
-    db.commit()
+    if turn.local_reply is not None:
+        reply, outcome = turn.local_reply, "discovery_template"
+    else:
+        with stage("completion"):
+            reply = await turn.speculation.reply() if turn.speculation is not None else None
+            if reply is None:
+                reply = await async_chat_completion(turn.prompt_messages, purpose=turn.purpose)
+        outcome = "reply"
+    await save_reply(db, turn, reply)
+    TURNS.inc(outcome=outcome)
 
     return {"reply": reply}
+
+
+async def _coalesced_turn(user_id, parts: list[str]) -> dict:
+    # Runs outside of any one request, so it owns its session.
+    async with AsyncSessionLocal() as db:
+        payload = ChatRequest(user_id=user_id, message="\n".join(parts))
+        return await run_chat_turn(payload, db, parts=parts)
+
+
+coalescer = Coalescer(_coalesced_turn, window=settings.CHAT_COALESCE_WINDOW, locks=user_locks)
+
+
+@router.post("/")
+async def chat(payload: ChatRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    {"reply": "..."}. With CHAT_COALESCE, quick consecutive messages of
+    a user are answered together: only the last request of the burst
+    gets the reply, the earlier ones get {"reply": "", "coalesced": true}
+    (see app/chat/coalesce.py).
+    """
+    if settings.CHAT_COALESCE:
+        return await coalescer.submit(payload.user_id, payload.message.strip())
+
+    async with user_locks.hold(payload.user_id):
+        return await run_chat_turn(payload, db)
+
+
+# ─────────────────────────────────────────────
+# STREAMING CHAT ENDPOINT
+# ─────────────────────────────────────────────
+
+@router.post("/stream")
+async def chat_stream(payload: ChatRequest):
+    """
+    Same turn as POST /chat/, streamed as NDJSON events:
+      {"type": "bubble", "text": "..."}   one per completed reply line
+      {"type": "done", "reply": "..."}    full reply, after it is saved
+      {"type": "error", "message": "..."}
+    """
+    return StreamingResponse(_stream_turn(payload), media_type="application/x-ndjson")
+
+
+async def _stream_turn(payload: ChatRequest):
+    # The session is owned by the generator: request dependencies may
+    # already be cleaned up while the body is still streaming.
+    # Streams are not coalesced, only serialized per user.
+    async with user_locks.hold(payload.user_id), AsyncSessionLocal() as db:
+        try:
+            turn = await prepare_turn(payload, db)
+
+            if turn.reply is not None:
+                for bubble in split_bubbles(turn.reply):
+                    yield ndjson_event("bubble", text=bubble)
+                yield ndjson_event("done", reply=turn.reply)
+                return
+
+            if turn.local_reply is not None:
+                for bubble in split_bubbles(turn.local_reply):
+                    yield ndjson_event("bubble", text=bubble)
+                await save_reply(db, turn, turn.local_reply)
+                TURNS.inc(outcome="discovery_template")
+                yield ndjson_event("done", reply=turn.local_reply)
+                return
+
+            splitter = BubbleSplitter()
+            first_bubble = None
+            with stage("completion"):
+                started = time.perf_counter()
+                async for delta in stream_chat_completion(turn.prompt_messages, purpose=turn.purpose):
+                    for bubble in splitter.feed(delta):
+                        if first_bubble is None:
+                            first_bubble = time.perf_counter() - started
+                            STAGE_SECONDS.observe(first_bubble, stage="first_bubble")
+                        yield ndjson_event("bubble", text=bubble)
+
+            for bubble in splitter.close():
+                yield ndjson_event("bubble", text=bubble)
+
+            await save_reply(db, turn, splitter.text)
+            TURNS.inc(outcome="stream")
+            yield ndjson_event("done", reply=splitter.text)
+
+        except Exception:
+            TURNS.inc(outcome="error")
+            logger.exception("chat stream failed")
+            yield ndjson_event("error", message="Something went wrong. Try again.")
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+
+from app.chat.assembler import AssembledPrompt, count_tokens
+from app.core.metrics import SPECULATION_WASTED_TOKENS, SPECULATIONS
+from app.core.openai_client import async_chat_completion
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# SPECULATIVE MAIN COMPLETION (opt-in: SPECULATIVE_REPLY)
+# ─────────────────────────────────────────────
+# The main completion normally starts only once the message analysis
+# (intent + persona) is in. With speculation it starts right after the
+# history is loaded, from a prompt built with the local classifier's
+# provisional intent and the persona as loaded. When the analysis is
+# in, the real prompt is built and compared:
+#
+#   blocked intent                          → cancelled ("blocked")
+#   different prompt (gating outcome, new
+#   persona detail, moved summary)          → cancelled ("changed")
+#   template DISCOVERY reply                → cancelled ("local")
+#   identical prompt                        → its reply is used ("hit")
+#
+# Wasted tokens are estimated with the assembler's tokenizer: the whole
+# prompt for every discarded call (it was sent), plus the reply when
+# it had already finished.
+
+class Speculation:
+    def __init__(self, prompt: AssembledPrompt, purpose: str):
+        self.prompt_messages = prompt.messages
+        self.prompt_tokens = prompt.total_tokens
+        self.purpose = purpose
+        self.task = asyncio.create_task(async_chat_completion(prompt.messages, purpose=purpose))
+        # Nobody may await it (turn failed or discarded); mark the error as seen.
+        self.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def matches(self, prompt: AssembledPrompt, purpose: str) -> bool:
+        return purpose == self.purpose and prompt.messages == self.prompt_messages
+
+    def discard(self, result: str):
+        """
+        `result`: why it was discarded (blocked | changed | local).
+        """
+        SPECULATIONS.inc(result=result)
+        SPECULATION_WASTED_TOKENS.inc(self.prompt_tokens, kind="prompt")
+
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled() and self.task.exception() is None:
+            SPECULATION_WASTED_TOKENS.inc(count_tokens(self.task.result() or ""), kind="completion")
+
+    async def reply(self) -> str | None:
+        """
+        The speculative reply once the real prompt matched; None if the
+        call failed (the caller then makes the normal call).
+        """
+        try:
+            reply = await self.task
+        except Exception:
+            logger.warning("speculative completion failed", exc_info=True)
+            SPECULATIONS.inc(result="failed")
+            return None
+
+        SPECULATIONS.inc(result="hit")
+        return reply
@@ -0,0 +1,47 @@
+import json
+
+
+# ─────────────────────────────────────────────
+# WHATSAPP BUBBLES FROM A TOKEN STREAM
+# ─────────────────────────────────────────────
+# tone_prompt() makes the model put every bubble on its own line, so a
+# bubble is complete as soon as its newline arrives.
+
+def split_bubbles(text: str) -> list[str]:
+    return [line.strip() for line in text.split("\n") if line.strip()]
+
+
+class BubbleSplitter:
+    """
+    Feed it streamed text deltas; it hands back each non-empty line
+    the moment it is complete. `text` is the full reply so far.
+    """
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self._pending = ""
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, delta: str) -> list[str]:
+        if not delta:
+            return []
+
+        self._parts.append(delta)
+        self._pending += delta
+
+        *lines, self._pending = self._pending.split("\n")
+        return [line.strip() for line in lines if line.strip()]
+
+    def close(self) -> list[str]:
+        """
+        Whatever is left after the last newline.
+        """
+        rest, self._pending = self._pending.strip(), ""
+        return [rest] if rest else []
+
+
+def ndjson_event(event_type: str, **data) -> str:
+    return json.dumps({"type": event_type, **data}, ensure_ascii=False) + "\n"
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+
+from sqlalchemy import select
+
+from app.chat.conversation import (
+    ConversationRecord,
+    conversation_cache,
+    publish_conversation,
+    save_summary,
+)
+from app.chat.history import load_history
+from app.chat.memory import refresh_summary, summary_due
+from app.core.config import settings
+from app.core.metrics import SUMMARY_JOBS, registry
+from app.db.models import Conversation
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# BACKGROUND SUMMARIZER
+# ─────────────────────────────────────────────
+# Folding old messages into Conversation.summary is one more LLM call,
+# and the turn that crossed the threshold used to wait for it before
+# its own reply. Now the turn only queues the conversation and
+# answers with the summary that is already stored.
+#
+# - one queued job per conversation (later requests are deduplicated)
+# - each job uses its own session and re-reads the row, so a stale
+#   request is a cheap no-op
+# - the write is conditional on the watermark it started from, so two
+#   workers (or processes) never overwrite each other's summary
+
+class SummaryWorker:
+    def __init__(self, session_factory, workers: int, queue_size: int):
+        self.session_factory = session_factory
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._queued: set = set()
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, convo: ConversationRecord) -> bool:
+        if convo.id in self._queued:
+            SUMMARY_JOBS.inc(result="deduplicated")
+            return False
+
+        try:
+            self._queue.put_nowait(convo.id)
+        except asyncio.QueueFull:
+            # Still due on the next turn, which queues it again.
+            SUMMARY_JOBS.inc(result="dropped")
+            return False
+
+        self._queued.add(convo.id)
+        SUMMARY_JOBS.inc(result="queued")
+        return True
+
+    def start(self):
+        if not self.running:
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        Stops the workers. Queued jobs are dropped: their watermark has
+        not moved, so the next turn of each conversation queues it again.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run(self):
+        while True:
+            conversation_id = await self._queue.get()
+            try:
+                await self.summarize(conversation_id)
+            except Exception:
+                logger.exception("summary job failed for conversation %s", conversation_id)
+                SUMMARY_JOBS.inc(result="failed")
+            finally:
+                self._queued.discard(conversation_id)
+                self._queue.task_done()
+
+    async def summarize(self, conversation_id) -> str:
+        """
+        Refreshes one conversation's summary if it is still due.
+        Returns the job result (written | not_due | conflict | missing).
+        """
+        async with self.session_factory() as db:
+            convo = await db.scalar(select(Conversation).filter_by(id=conversation_id))
+            if convo is None:
+                result = "missing"
+            else:
+                before = ConversationRecord.from_row(convo)
+                messages = await load_history(db, before.id, after=before.summarized_until)
+                # No transaction stays open during the LLM call.
+                await db.commit()
+
+                after, _ = await refresh_summary(before, messages)
+                if after == before:
+                    # Usually a cache that missed someone else's
+                    # refresh: it would keep the old summary (and keep
+                    # queueing this job) until its TTL.
+                    await _refresh_cached(before)
+                    result = "not_due"
+                elif await save_summary(db, before, after):
+                    await db.commit()
+                    await publish_conversation(after)
+                    result = "written"
+                else:
+                    await db.rollback()
+                    result = "conflict"
+
+        SUMMARY_JOBS.inc(result=result)
+        return result
+
+
+async def _refresh_cached(record: ConversationRecord):
+    """
+    Publishes the re-read `record` when the cached one for the same
+    conversation differs from it.
+    """
+    cached, _ = await conversation_cache.get(str(record.user_id))
+    if cached is not None and cached.id == record.id and cached != record:
+        await publish_conversation(record)
+
+
+def _session_factory():
+    from app.db.session import AsyncSessionLocal
+
+    return AsyncSessionLocal()
+
+
+summary_worker = SummaryWorker(
+    _session_factory,
+    workers=settings.SUMMARY_WORKERS,
+    queue_size=settings.SUMMARY_QUEUE_SIZE,
+)
+
+registry.gauge_callback(
+    "healthbot_summary_queue_depth",
+    "Conversations waiting for a background summary refresh",
+    (),
+    lambda: {(): summary_worker.depth},
+)
+
+
+async def update_summary(convo: ConversationRecord, messages):
+    """
+    Route entry point: queues a due refresh when the background worker
+    is running (this turn keeps the stored summary), otherwise folds it
+    in now. No statement: the caller writes a changed conversation with
+    save_summary in its reply transaction.
+
+    Returns (conversation, messages to send verbatim).
+    """
+    if summary_worker.running:
+        if summary_due(messages):
+            summary_worker.submit(convo)
+        return convo, messages
+
+    return await refresh_summary(convo, messages)
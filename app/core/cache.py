@@ -0,0 +1,250 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# IN-PROCESS LRU + TTL
+# ─────────────────────────────────────────────
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry TTL.
+    Evicts the least recently used entry once `maxsize` is reached.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float | None = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# ─────────────────────────────────────────────
+# SHARED BACKENDS (CROSS-WORKER)
+# ─────────────────────────────────────────────
+# Values are JSON-encoded so any backend can store them as strings.
+
+class SharedCacheBackend:
+    async def get(self, key: str):
+        raise NotImplementedError
+
+    async def set(self, key: str, value, ttl: float):
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        """
+        Atomically increments an integer (missing → 0) and returns it.
+        """
+        raise NotImplementedError
+
+
+class InMemoryBackend(SharedCacheBackend):
+    """
+    Local stand-in for a shared backend (tests, single-worker runs).
+    Behaves like Redis GET/SET EX, including JSON round-tripping.
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[str, float]] = {}
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        raw, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value, ttl: float):
+        self._data[key] = (json.dumps(value), time.monotonic() + ttl)
+
+    async def incr(self, key: str) -> int:
+        value = (await self.get(key) or 0) + 1
+        self._data[key] = (json.dumps(value), float("inf"))
+        return value
+
+
+class RedisBackend(SharedCacheBackend):
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND_URL points to Redis but the `redis` package is not installed") from e
+
+        self._redis = redis.from_url(url)
+
+    async def get(self, key: str):
+        raw = await self._redis.get(key)
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value, ttl: float):
+        await self._redis.set(key, json.dumps(value), ex=max(1, int(ttl)))
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+
+def shared_backend_from_url(url: str | None) -> SharedCacheBackend | None:
+    """
+    None / ""  → no shared backend (in-process caching only)
+    memory://  → InMemoryBackend
+    redis://…  → RedisBackend
+    """
+    if not url:
+        return None
+    if url.startswith("memory://"):
+        return InMemoryBackend()
+    return RedisBackend(url)
+
+
+# ─────────────────────────────────────────────
+# VERSIONED CACHE (WRITE-THROUGH INVALIDATION)
+# ─────────────────────────────────────────────
+# For mutable records (e.g. personas). Values stay in-process; only a
+# small per-key version counter is shared. A writer bumps the version
+# after committing, which makes every worker's copy stale at once.
+#
+# Readers take the version BEFORE loading from the database and tag
+# the loaded value with it, so a load that races with a write is
+# already stale when it lands in the cache.
+
+class VersionedCache:
+    def __init__(self, namespace: str, maxsize: int, ttl: float, shared: SharedCacheBackend | None = None):
+        self.namespace = namespace
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        # Without a shared backend the counters are per process.
+        self._versions = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.bumps = 0
+
+    def _version_key(self, key: str) -> str:
+        return f"{self.namespace}:ver:{key}"
+
+    async def version(self, key: str) -> int | None:
+        """
+        Current version of `key`; None when the shared backend is
+        unreachable (nothing can be trusted then).
+        """
+        if self.shared is None:
+            return self._versions.get(key, 0)
+        try:
+            return await self.shared.get(self._version_key(key)) or 0
+        except Exception:
+            logger.warning("shared version lookup failed for %s", self.namespace, exc_info=True)
+            return None
+
+    async def get(self, key: str) -> tuple[object | None, int | None]:
+        """
+        Returns (value, version). On a miss value is None, and
+        `version` is what the freshly loaded value must be set with.
+        """
+        version = await self.version(key)
+        entry = self.local.get(key)
+
+        if entry is not None and version is not None:
+            entry_version, value = entry
+            if entry_version == version:
+                self.hits += 1
+                return value, version
+            self.stale += 1
+
+        self.misses += 1
+        return None, version
+
+    def set(self, key: str, value, version: int | None):
+        if version is None:
+            return
+        self.local.set(key, (version, value))
+
+    async def bump(self, key: str) -> int | None:
+        self.bumps += 1
+        self.local.pop(key)
+
+        if self.shared is None:
+            version = self._versions.get(key, 0) + 1
+            self._versions.set(key, version)
+            return version
+        try:
+            return await self.shared.incr(self._version_key(key))
+        except Exception:
+            logger.warning("shared version bump failed for %s", self.namespace, exc_info=True)
+            return None
+
+    async def put(self, key: str, value):
+        """
+        Write-through: call after the new value is committed.
+        """
+        self.set(key, value, await self.bump(key))
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.local),
+            "maxsize": self.local.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "bumps": self.bumps,
+        }
@@ -7,6 +7,110 @@ class Settings(BaseSettings):
     JWT_SECRET: str
     JWT_ALGO: str = "HS256"
 
+    # LLM transport (OPENAI_BASE_URL: any OpenAI-compatible server)
+    OPENAI_BASE_URL: str | None = None
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_MAX_CONCURRENCY: int = 64
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 0.25
+    LLM_RETRY_MAX_DELAY: float = 4.0
+    # Model, temperature, max_tokens, stop and per-attempt timeout by
+    # call purpose: defaults in app/core/llm_routing.py, overridden per
+    # field here, e.g. {"classify": {"model": "gpt-4.1-nano"}}
+    LLM_DEFAULT_MODEL: str = "gpt-4o-mini"
+    LLM_ROUTES: dict[str, dict] = {}
+    # Hedged classifier / message analysis calls: duplicate after the recent p95 latency
+    # (LLM_HEDGE_DELAY until enough samples are in)
+    LLM_HEDGE_CLASSIFY: bool = False
+    LLM_HEDGE_DELAY: float = 1.0
+
+    # Async DB pool (request path)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+
+    # Chat pre-processing (persona extraction + intent classification)
+    PERSONA_EXTRACTION_TIMEOUT: float = 4.0
+    INTENT_CLASSIFICATION_TIMEOUT: float = 4.0
+
+    # Blocklist pre-screen (canned reply for clear violations, no LLM)
+    GUARDRAIL_PRESCREEN: bool = True
+
+    # Violation counts written by a background batch writer
+    VIOLATION_BATCH_WRITES: bool = False
+    VIOLATION_FLUSH_INTERVAL: float = 1.0
+    VIOLATION_BATCH_SIZE: int = 500
+
+    # Persona extraction output: json_schema | json_object | text
+    PERSONA_EXTRACTION_RESPONSE_FORMAT: str = "json_schema"
+
+    # Message analysis: intent + persona fields in one structured call
+    # (False: two separate calls, run concurrently).
+    # Off until `python -m bench.eval_analysis` against the production
+    # model shows the combined call matching the separate ones.
+    MESSAGE_ANALYSIS_COMBINED: bool = False
+
+    # Per-user message coalescing on POST /chat: messages within the
+    # window are answered by one pipeline run (app/chat/coalesce.py).
+    # Turns of one user are serialized either way.
+    CHAT_COALESCE: bool = False
+    CHAT_COALESCE_WINDOW: float = 0.6
+
+    # Speculative main completion (POST /chat only): started with the
+    # local classifier's provisional intent while the message analysis
+    # runs, used only if the final prompt turns out identical
+    SPECULATIVE_REPLY: bool = False
+
+    # DISCOVERY turns (persona not ready): "template" answers them from
+    # app/chat/discovery.py without the main LLM, "llm" always asks it
+    DISCOVERY_MODE: str = "template"
+    # How long the fields a DISCOVERY reply asked for are remembered
+    # (short answers to them pass the persona signal filter)
+    DISCOVERY_ASKED_TTL: float = 1800
+    DISCOVERY_ASKED_CACHE_SIZE: int = 10000
+
+    # Local fast-path intent classifier (in front of the LLM)
+    INTENT_LOCAL_CLASSIFIER: bool = True
+    INTENT_LOCAL_MIN_CONFIDENCE: float = 0.9
+    INTENT_SAFETY_ESCALATION_PROB: float = 0.05
+
+    # Shared cache backend for multi-worker deployments
+    # (None: in-process only, "memory://" local stand-in, "redis://...")
+    CACHE_BACKEND_URL: str | None = None
+
+    # Response cache for intent classification / persona extraction
+    LLM_CACHE_SIZE: int = 10000
+    LLM_CACHE_TTL: float = 24 * 3600
+
+    # Persona cache (per user_id, invalidated on write)
+    PERSONA_CACHE_SIZE: int = 10000
+    PERSONA_CACHE_TTL: float = 3600
+    # Used instead without CACHE_BACKEND_URL: another worker's write is
+    # only seen once the local entry expires
+    PERSONA_CACHE_LOCAL_TTL: float = 30
+
+    # Active conversation cache (per user_id)
+    CONVERSATION_CACHE_SIZE: int = 10000
+    CONVERSATION_CACHE_TTL: float = 3600
+
+    # In-process metrics served on GET /metrics
+    METRICS_ENABLED: bool = True
+
+    # Rolling conversation summary
+    SUMMARY_TRIGGER_MESSAGES: int = 40
+    SUMMARY_TRIGGER_TOKENS: int = 3000
+    SUMMARY_KEEP_RECENT: int = 30
+
+    # Background summary refresh (False: inline, before the reply)
+    SUMMARY_BACKGROUND: bool = True
+    SUMMARY_WORKERS: int = 2
+    SUMMARY_QUEUE_SIZE: int = 1000
+
+    # Main completion prompt size
+    PROMPT_TOKEN_BUDGET: int = 6000
+    PROMPT_MAX_MESSAGE_TOKENS: int = 800
+
     class Config:
         env_file = ".env"
 
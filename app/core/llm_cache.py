@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import logging
+import re
+
+from app.core.cache import SharedCacheBackend, TTLCache, shared_backend_from_url
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# RESPONSE CACHE FOR DETERMINISTIC LLM SUB-TASKS
+# ─────────────────────────────────────────────
+# Intent classification and persona extraction only depend on the
+# prompt and the message text, and short openers ("hi", "weight loss
+# karna hai") repeat across users a lot. Their results are cached on
+# (task, prompt version, normalized message).
+
+_SPACES = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?,]+$")
+
+
+def normalize_message(message: str) -> str:
+    text = _SPACES.sub(" ", (message or "").casefold()).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+def prompt_version(*parts: str) -> str:
+    """
+    Short hash of the prompt text, so editing a prompt automatically
+    invalidates everything cached for the old one.
+    """
+    return hashlib.sha1("\x00".join(parts).encode()).hexdigest()[:10]
+
+
+class LLMResponseCache:
+    def __init__(self, maxsize: int, ttl: float, shared: SharedCacheBackend | None = None):
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.ttl = ttl
+        self.shared_hits = 0
+        self.coalesced = 0
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def key(namespace: str, version: str, message: str) -> str:
+        digest = hashlib.sha1(normalize_message(message).encode()).hexdigest()
+        return f"llm:{namespace}:{version}:{digest}"
+
+    async def get_or_compute(self, namespace: str, version: str, message: str, compute):
+        """
+        Returns the cached result for this message, or awaits `compute()`
+        and caches what it returns. None is never cached and exceptions
+        propagate uncached.
+
+        Concurrent misses on the same key share one call. The call runs
+        in its own task, so a caller that times out (and gets cancelled)
+        does not cancel it for the others; it still fills the cache.
+        """
+        key = self.key(namespace, version, message)
+
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._fill(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+
+        return await asyncio.shield(task)
+
+    def _done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Every waiter may have given up already; mark the error as seen.
+        if not task.cancelled():
+            task.exception()
+
+    async def _fill(self, key: str, compute):
+        value = await self._shared_get(key)
+        if value is not None:
+            self.shared_hits += 1
+        else:
+            value = await compute()
+            if value is not None:
+                await self._shared_set(key, value)
+
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    async def _shared_get(self, key: str):
+        if self.shared is None:
+            return None
+        try:
+            return await self.shared.get(key)
+        except Exception:
+            logger.warning("shared LLM cache get failed", exc_info=True)
+            return None
+
+    async def _shared_set(self, key: str, value):
+        if self.shared is None:
+            return
+        try:
+            await self.shared.set(key, value, self.ttl)
+        except Exception:
+            logger.warning("shared LLM cache set failed", exc_info=True)
+
+    def stats(self) -> dict:
+        local = self.local.stats()
+        return {
+            **local,
+            "shared_hits": self.shared_hits,
+            "coalesced": self.coalesced,
+            # A "miss" of the whole cache is a real LLM call.
+            "llm_calls": local["misses"] - self.shared_hits - self.coalesced,
+        }
+
+
+llm_cache = LLMResponseCache(
+    maxsize=settings.LLM_CACHE_SIZE,
+    ttl=settings.LLM_CACHE_TTL,
+    shared=shared_backend_from_url(settings.CACHE_BACKEND_URL),
+)
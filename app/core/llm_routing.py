@@ -0,0 +1,74 @@
+from dataclasses import asdict, dataclass, replace
+
+from app.core.config import settings
+
+
+# ─────────────────────────────────────────────
+# PER-PURPOSE LLM ROUTING
+# ─────────────────────────────────────────────
+# Every LLM call names its purpose; the purpose picks the model and the
+# generation limits. A one-word intent label, a small JSON object, a
+# summary and a full reply need very different budgets, and the short
+# ones must not be able to run away generating text.
+#
+# Settings.LLM_ROUTES overrides single fields per purpose, e.g.
+#   LLM_ROUTES='{"classify": {"model": "gpt-4.1-nano"}, "advice": {"max_tokens": 600}}'
+
+@dataclass(frozen=True)
+class LLMRoute:
+    model: str
+    temperature: float
+    max_tokens: int | None
+    timeout: float  # per attempt, seconds
+    stop: tuple[str, ...] | None = None
+
+    def params(self) -> dict:
+        """
+        Request parameters for chat.completions.create (timeout aside).
+        """
+        params = {"model": self.model, "temperature": self.temperature}
+        if self.max_tokens is not None:
+            params["max_tokens"] = self.max_tokens
+        if self.stop:
+            params["stop"] = list(self.stop)
+        return params
+
+
+def _default_routes(model: str) -> dict[str, LLMRoute]:
+    return {
+        # Structured / label outputs: deterministic, tightly capped
+        "analyze": LLMRoute(model, temperature=0.0, max_tokens=170, timeout=8.0),
+        "classify": LLMRoute(model, temperature=0.0, max_tokens=8, timeout=5.0, stop=("\n",)),
+        "extract": LLMRoute(model, temperature=0.0, max_tokens=150, timeout=8.0),
+        "summarize": LLMRoute(model, temperature=0.3, max_tokens=400, timeout=30.0),
+        # User-facing replies
+        "discovery": LLMRoute(model, temperature=0.7, max_tokens=200, timeout=20.0),
+        "advice": LLMRoute(model, temperature=0.6, max_tokens=800, timeout=30.0),
+    }
+
+
+def build_routes(overrides: dict[str, dict], model: str) -> dict[str, LLMRoute]:
+    """
+    Default routes with `overrides` merged in field by field. Unknown
+    purposes get a route based on "advice".
+    """
+    routes = _default_routes(model)
+    for purpose, fields in overrides.items():
+        base = routes.get(purpose, routes["advice"])
+        if "stop" in fields and fields["stop"] is not None:
+            fields = {**fields, "stop": tuple(fields["stop"])}
+        try:
+            routes[purpose] = replace(base, **fields)
+        except TypeError:
+            raise ValueError(
+                f"LLM_ROUTES[{purpose!r}]: unknown field in {sorted(fields)}; "
+                f"allowed: {sorted(asdict(base))}"
+            ) from None
+    return routes
+
+
+LLM_ROUTES = build_routes(settings.LLM_ROUTES, settings.LLM_DEFAULT_MODEL)
+
+
+def llm_route(purpose: str) -> LLMRoute:
+    return LLM_ROUTES.get(purpose, LLM_ROUTES["advice"])
@@ -0,0 +1,273 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from app.core.config import settings
+
+
+# ─────────────────────────────────────────────
+# IN-PROCESS METRICS (PROMETHEUS TEXT FORMAT)
+# ─────────────────────────────────────────────
+# Recording is a dict lookup plus an add; nothing is formatted until
+# GET /metrics is scraped. Values are per worker process, as with any
+# Prometheus client without multiprocess mode.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_str(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labelnames), 0)
+
+    def total(self) -> float:
+        return sum(self._values.values())
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_label_str(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self.buckets = buckets
+        # label values → [per-bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        row = self._values.get(key)
+        if row is None:
+            row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def counts(self) -> dict[tuple, int]:
+        """
+        Observation count per label values.
+        """
+        return {key: sum(row[:-1]) for key, row in self._values.items()}
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        for key, row in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row):
+                cumulative += count
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else repr(bound))
+                yield f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_str(self.labelnames, key)} {row[-1]}"
+            yield f"{self.name}_count{_label_str(self.labelnames, key)} {cumulative}"
+
+
+class CallbackGauge:
+    """
+    Gauge read at scrape time from `fn()` → {label values tuple: value}.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple, fn):
+        self.name = name
+        self.help = help
+        self.labelnames = labels
+        self.fn = fn
+
+    def samples(self):
+        for key, value in self.fn().items():
+            yield f"{self.name}{_label_str(self.labelnames, key)} {value}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge_callback(self, name, help, labels, fn) -> CallbackGauge:
+        return self.register(CallbackGauge(name, help, labels, fn))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# ─────────────────────────────────────────────
+# APPLICATION METRICS
+# ─────────────────────────────────────────────
+
+STAGE_SECONDS = registry.histogram(
+    "healthbot_stage_seconds", "Wall time of each /chat pipeline stage", ("stage",),
+)
+TURNS = registry.counter(
+    "healthbot_turns_total", "Chat turns by how they were answered", ("outcome",),
+)
+
+LLM_SECONDS = registry.histogram(
+    "healthbot_llm_request_seconds", "LLM call latency including retries", ("purpose", "outcome"),
+)
+LLM_TOKENS = registry.counter(
+    "healthbot_llm_tokens_total", "Tokens reported in the LLM response usage", ("purpose", "kind"),
+)
+LLM_RETRIES = registry.counter(
+    "healthbot_llm_retries_total", "Retried LLM attempts", ("purpose",),
+)
+LLM_HEDGES = registry.counter(
+    "healthbot_llm_hedges_total", "Hedged LLM requests sent / won", ("purpose", "result"),
+)
+
+PERSONA_EXTRACTIONS = registry.counter(
+    "healthbot_persona_extractions_total",
+    "Persona extraction responses by parse result (ok | repaired | invalid_json | not_object | empty)",
+    ("result",),
+)
+PERSONA_FIELDS_REJECTED = registry.counter(
+    "healthbot_persona_fields_rejected_total", "Extracted values that failed local validation", ("field",),
+)
+
+MESSAGE_ANALYSES = registry.counter(
+    "healthbot_message_analyses_total",
+    "Message analyses by LLM path (local | classify | extract | combined | fallback)",
+    ("path",),
+)
+
+SUMMARY_JOBS = registry.counter(
+    "healthbot_summary_jobs_total",
+    "Background summary jobs (queued | deduplicated | dropped | written | not_due | conflict | missing | failed)",
+    ("result",),
+)
+
+COALESCED_MESSAGES = registry.counter(
+    "healthbot_coalesced_messages_total",
+    "Messages answered by a later message's pipeline run (coalesced burst)",
+)
+
+SPECULATIONS = registry.counter(
+    "healthbot_speculations_total",
+    "Speculative main completions (hit | blocked | changed | local | failed)",
+    ("result",),
+)
+SPECULATION_WASTED_TOKENS = registry.counter(
+    "healthbot_speculation_wasted_tokens_total",
+    "Estimated tokens of discarded speculative completions",
+    ("kind",),
+)
+
+DB_STATEMENTS = registry.counter(
+    "healthbot_db_statements_total", "SQL statements executed", ("statement",),
+)
+DB_TRANSACTIONS = registry.counter(
+    "healthbot_db_transactions_total", "Database transactions", ("result",),
+)
+
+
+def stage(name: str):
+    """
+    `with stage("history"): ...` times one pipeline stage.
+    """
+    return STAGE_SECONDS.time(stage=name)
+
+
+def record_usage(purpose: str, usage):
+    """
+    Token counts from an OpenAI `usage` object (absent on some
+    compatible servers).
+    """
+    if usage is None:
+        return
+    LLM_TOKENS.inc(usage.prompt_tokens or 0, purpose=purpose, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens or 0, purpose=purpose, kind="completion")
+
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached:
+        LLM_TOKENS.inc(cached, purpose=purpose, kind="cached_prompt")
+
+
+def instrument_engine(engine):
+    """
+    Counts statements and transactions on a (sync) SQLAlchemy engine;
+    for an AsyncEngine pass `async_engine.sync_engine`.
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _execute(conn, cursor, statement, *args):
+        DB_STATEMENTS.inc(statement=statement.lstrip().split(None, 1)[0].lower() if statement else "")
+
+    @event.listens_for(engine, "commit")
+    def _commit(conn):
+        DB_TRANSACTIONS.inc(result="commit")
+
+    @event.listens_for(engine, "rollback")
+    def _rollback(conn):
+        DB_TRANSACTIONS.inc(result="rollback")
+
+
+def register_cache(name: str, cache):
+    """
+    Exposes `cache.stats()` as healthbot_cache{cache=name,stat=...}.
+    """
+    _caches[name] = cache
+
+
+_caches: dict[str, object] = {}
+
+registry.gauge_callback(
+    "healthbot_cache",
+    "Cache statistics (size, hits, misses, ...) per cache",
+    ("cache", "stat"),
+    lambda: {
+        (name, stat): value
+        for name, cache in _caches.items()
+        for stat, value in cache.stats().items()
+    },
+)
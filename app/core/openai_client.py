@@ -1,12 +1,244 @@
-from openai import OpenAI
+import asyncio
+import logging
+import random
+import statistics
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
 from app.core.config import settings
+from app.core.llm_routing import llm_route
+from app.core.metrics import LLM_HEDGES, LLM_RETRIES, LLM_SECONDS, record_usage
+
+logger = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────
+# TRANSPORT
+# ─────────────────────────────────────────────
+# One pooled HTTP client per process. Retries are done here (not by
+# the SDK) so they can be jittered, bounded by the concurrency
+# semaphore and counted per call purpose.
+#
+# Purposes: analyze | classify | extract | summarize | discovery | advice
+# (model and generation limits per purpose: app/core/llm_routing.py)
+
+_limits = httpx.Limits(
+    max_connections=settings.LLM_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+client = OpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL,
+    timeout=llm_route("advice").timeout,
+)
+async_client = AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL,
+    max_retries=0,
+    http_client=openai.DefaultAsyncHttpxClient(limits=_limits),
+)
 
-def chat_completion(messages):
+# Upper bound on LLM calls in flight from this worker; during a
+# provider latency spike requests queue here instead of piling up
+# open connections.
+_semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+def chat_completion(messages, purpose: str = "advice"):
+    route = llm_route(purpose)
     response = client.chat.completions.create(
-        model="gpt-4o-mini",
         messages=messages,
-        temperature=0.6
+        timeout=route.timeout,
+        **route.params(),
     )
     return response.choices[0].message.content
+
+
+def _backoff(attempt: int, error: Exception) -> float:
+    """
+    Full jitter: uniform(0, base * 2^attempt), capped. A Retry-After
+    from the provider is honoured when it is longer.
+    """
+    delay = random.uniform(0, min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt))
+
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        delay = max(delay, min(float(retry_after), settings.LLM_RETRY_MAX_DELAY))
+    except (TypeError, ValueError):
+        pass
+
+    return delay
+
+
+async def _with_retries(purpose: str, call):
+    """
+    Runs `call()` under the semaphore, retrying retryable errors. The
+    semaphore is not held while backing off.
+    """
+    for attempt in range(settings.LLM_MAX_RETRIES + 1):
+        try:
+            async with _semaphore:
+                return await call()
+        except RETRYABLE_ERRORS as e:
+            if attempt == settings.LLM_MAX_RETRIES:
+                raise
+            delay = _backoff(attempt, e)
+            LLM_RETRIES.inc(purpose=purpose)
+            logger.warning(
+                "LLM %s call failed (%s), retry %d in %.2fs",
+                purpose, type(e).__name__, attempt + 1, delay,
+            )
+            await asyncio.sleep(delay)
+
+
+# ─────────────────────────────────────────────
+# HEDGED REQUESTS (SHORT CLASSIFIER CALLS)
+# ─────────────────────────────────────────────
+# If the first request has not answered after the recent p95 latency,
+# an identical second one is sent; whichever finishes first wins and
+# the other is cancelled. Costs ~5% extra calls, cuts the tail.
+
+class LatencyWindow:
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples: deque = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def p95(self, default: float) -> float:
+        if len(self._samples) < self.min_samples:
+            return default
+        return statistics.quantiles(self._samples, n=20)[-1]
+
+
+_hedge_latency = LatencyWindow()
+
+
+# The pre-processing calls every turn waits on before it can answer.
+HEDGED_PURPOSES = {"analyze", "classify"}
+
+
+async def _hedged(purpose: str, call):
+    start = time.monotonic()
+    first = asyncio.ensure_future(_with_retries(purpose, call))
+    tasks = {first}
+
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=_hedge_latency.p95(settings.LLM_HEDGE_DELAY))
+        if not done:
+            LLM_HEDGES.inc(purpose=purpose, result="sent")
+            tasks.add(asyncio.ensure_future(_with_retries(purpose, call)))
+
+        while True:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                tasks.discard(task)
+                if task.exception() is None or not tasks:
+                    if task is not first and task.exception() is None:
+                        LLM_HEDGES.inc(purpose=purpose, result="won")
+                    _hedge_latency.add(time.monotonic() - start)
+                    return task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# ─────────────────────────────────────────────
+# PUBLIC API
+# ─────────────────────────────────────────────
+
+@contextmanager
+def _observe(purpose: str):
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        LLM_SECONDS.observe(time.perf_counter() - start, purpose=purpose, outcome=outcome)
+
+
+async def async_chat_completion(messages, purpose: str = "advice", **options):
+    """
+    Same as chat_completion, but awaits the network instead of
+    blocking a threadpool worker while the model is generating.
+    `purpose` picks the route (model, limits, timeout) and hedging for
+    HEDGED_PURPOSES. `options` are passed through and win over the
+    route (response_format, max_tokens, ...).
+    """
+    route = llm_route(purpose)
+    params = {**route.params(), **options}
+
+    async def call():
+        return await async_client.chat.completions.create(
+            messages=messages,
+            timeout=route.timeout,
+            **params,
+        )
+
+    with _observe(purpose):
+        if purpose in HEDGED_PURPOSES and settings.LLM_HEDGE_CLASSIFY:
+            response = await _hedged(purpose, call)
+        else:
+            response = await _with_retries(purpose, call)
+
+    record_usage(purpose, getattr(response, "usage", None))
+    return response.choices[0].message.content
+
+
+async def stream_chat_completion(messages, purpose: str = "advice"):
+    """
+    Yields the reply as text deltas while the model generates it.
+    Only opening the stream is retried; once text has been yielded a
+    failure propagates. Holds a semaphore slot for the whole stream.
+    """
+    route = llm_route(purpose)
+
+    async def call():
+        return await async_client.chat.completions.create(
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=route.timeout,
+            **route.params(),
+        )
+
+    with _observe(purpose):
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            async with _semaphore:
+                try:
+                    stream = await call()
+                except RETRYABLE_ERRORS as e:
+                    if attempt == settings.LLM_MAX_RETRIES:
+                        raise
+                    delay = _backoff(attempt, e)
+                else:
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                        if getattr(chunk, "usage", None) is not None:
+                            record_usage(purpose, chunk.usage)
+                    return
+
+            LLM_RETRIES.inc(purpose=purpose)
+            logger.warning("LLM %s stream failed to open, retry %d in %.2fs", purpose, attempt + 1, delay)
+            await asyncio.sleep(delay)
@@ -0,0 +1,21 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+# ─────────────────────────────────────────────
+# DIALECT-AWARE INSERT (ON CONFLICT SUPPORT)
+# ─────────────────────────────────────────────
+# Postgres is the production database; SQLite is only used for local
+# benchmarks. Both support INSERT ... ON CONFLICT with index_elements.
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def insert(db, model):
+    """
+    INSERT construct for the session's database, with
+    on_conflict_do_nothing / on_conflict_do_update available.
+    """
+    return _INSERTS[db.bind.dialect.name](model)
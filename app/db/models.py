@@ -9,9 +9,10 @@ from sqlalchemy import (
     Integer,
     UniqueConstraint,
     Index,
+    JSON,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -56,7 +57,7 @@ class Persona(Base):
     activity_level = Column(String, nullable=True)
     height_cm = Column(Integer, nullable=True)  # NEW
     weight_kg = Column(Integer, nullable=True)  # NEW
-    misc_persona = Column(JSONB, default=dict, nullable=False)
+    misc_persona = Column(JSONB().with_variant(JSON(), "sqlite"), default=dict, nullable=False)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     user = relationship("User", back_populates="persona")
@@ -76,6 +77,7 @@ class Conversation(Base):
     )
     phase = Column(String, nullable=False, default="persona", index=True)
     summary = Column(Text, nullable=True)  # Long-term memory summary
+    summarized_until = Column(DateTime, nullable=True)  # created_at of the last message folded into summary
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     is_active = Column(Boolean, default=True, nullable=False)
     user = relationship("User", back_populates="conversations")
@@ -84,6 +86,18 @@ class Conversation(Base):
         back_populates="conversation",
         cascade="all, delete-orphan",
     )
+    __table_args__ = (
+        # At most one active conversation per user. Also the index for
+        # the per-message "active conversation of this user" lookup,
+        # which no longer scans archived conversations.
+        Index(
+            "uq_conversations_user_active",
+            "user_id",
+            unique=True,
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active"),
+        ),
+    )
 
 # ─────────────────────────────────────────────
 # MESSAGES
@@ -96,12 +110,20 @@ class Message(Base):
         UUID(as_uuid=True),
         ForeignKey("conversations.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
     )
     role = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     conversation = relationship("Conversation", back_populates="messages")
+    __table_args__ = (
+        # Serves both "messages of a conversation" and the tail-window
+        # history query (ORDER BY created_at DESC LIMIT n).
+        # create_all never adds indexes to an existing table; existing
+        # databases need (Postgres, without blocking writes):
+        #   CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_messages_convo_created
+        #       ON messages (conversation_id, created_at);
+        Index("idx_messages_convo_created", "conversation_id", "created_at"),
+    )
 
 # ─────────────────────────────────────────────
 # GUARDRAIL VIOLATIONS
@@ -1,6 +1,9 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 # 🔹 SQLAlchemy Engine
 engine = create_engine(
@@ -19,6 +22,39 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,  
 )
 
+
+def async_database_url(url: str):
+    """
+    Maps the (sync) DATABASE_URL onto its asyncio driver,
+    e.g. postgresql:// or postgresql+psycopg2:// -> postgresql+asyncpg://
+    (sqlite:// -> sqlite+aiosqlite:// for local benchmarks)
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+# 🔹 Async engine (used by the request path)
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+)
+
+instrument_engine(async_engine.sync_engine)
+
+# 🔹 Async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # 🔹 Base class for models
 Base = declarative_base()
 
@@ -43,3 +79,13 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Async counterpart of get_db for `async def` routes.
+    The connection is only checked out while a transaction is open,
+    not for the whole lifetime of the request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
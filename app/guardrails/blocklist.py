@@ -0,0 +1,66 @@
+# ─────────────────────────────────────────────
+# GUARDRAIL PRE-SCREEN BLOCKLIST
+# ─────────────────────────────────────────────
+# Whole-word phrases (Hinglish + English), matched after the same
+# normalization as the user message (lowercase, punctuation → space).
+#
+# "block":  unambiguous on its own → canned reply, no LLM call at all.
+#           Must follow INTENT_PROMPT's rules: if a phrase could belong
+#           to a diet / fitness / lifestyle question, it is NOT here.
+#           Neither are ordinary Hinglish words ("chut gaya" = missed),
+#           phrases with an everyday sense ("hurt myself in the gym",
+#           "cut myself off from sugar"),
+#           or phrases that run on into a harmless one ("... bomb
+#           protein shake"). No 3+ repeated characters either: the
+#           message side collapses them ("xxx" → "x", as in "3 x 12").
+# "review": might be a violation → the LLM classifier decides
+#           (the local fast path never answers these).
+
+BLOCKLIST: dict[str, dict[str, list[str]]] = {
+    "sexual": {
+        "block": [
+            "porn", "porno", "pornography", "porn video",
+            "nudes", "send nudes", "nude pics", "nude photo",
+            "sex position", "sex positions", "sex karna", "sex kaise",
+            "sex chat", "sexting", "blowjob", "handjob", "dick pic",
+            "masturbate", "masturbation", "horny", "orgasm",
+            "chudai", "lund",
+        ],
+        "review": [
+            "sex", "sexual", "naked", "nude", "boobs", "penis", "vagina",
+            "erection", "condom", "condoms", "libido", "dirty talk", "chut",
+        ],
+    },
+    "harmful": {
+        "block": [
+            "suicide", "suicidal", "kill myself", "end my life",
+            "khudkushi", "aatmahatya", "atmahatya",
+            "marna chahta hu", "marna chahti hu", "mar jana chahta hu",
+            "mar jana chahti hu", "jeena nahi chahta", "jeena nahi chahti",
+            "self harm",
+            "overdose kaise", "how to overdose",
+        ],
+        "review": [
+            "marna", "mar jana", "overdose", "drugs", "weed", "ganja",
+            "starve", "bina khaye", "vomit", "laxative", "laxatives",
+            "purge", "weapon", "gun", "bomb", "bomb banana", "make a bomb",
+            "hurt myself", "cut myself",
+        ],
+    },
+    "medical": {
+        "block": [
+            "dosage", "kitni dose", "dose kitni", "kitni tablet",
+            "tablet kitni", "prescription", "prescribe",
+            "paracetamol", "crocin", "dolo", "ibuprofen", "azithromycin",
+            "amoxicillin", "antibiotic", "antibiotics", "metformin",
+            "finasteride", "minoxidil", "thyroxine", "levothyroxine",
+            "insulin dose", "steroid dose",
+        ],
+        "review": [
+            "medicine", "medicines", "dawai", "dawa", "tablet", "tablets",
+            "capsule", "pills", "supplement", "supplements", "doctor",
+            "diagnosis", "disease", "bimari", "injection", "syrup",
+            "mg", "report", "blood", "infection", "fever", "bukhar",
+        ],
+    },
+}
@@ -0,0 +1,150 @@
+# ─────────────────────────────────────────────
+# SEED CORPUS FOR THE LOCAL INTENT MODEL
+# ─────────────────────────────────────────────
+# Short, realistic user messages labelled with the same rules as
+# INTENT_PROMPT (hairfall/tiredness → lifestyle, gym soreness → fitness,
+# diet for BP/sugar without medicines → diet, ...).
+# The model is trained from this list at import time; keep it small,
+# balanced and free of anything that also appears in the eval fixtures.
+
+SEED_EXAMPLES: list[tuple[str, str]] = [
+    # diet
+    ("weight loss karna hai", "diet"),
+    ("mujhe 5 kg kam karna hai", "diet"),
+    ("breakfast me kya khau", "diet"),
+    ("veg diet plan chahiye", "diet"),
+    ("protein kaise badhau vegetarian hoke", "diet"),
+    ("roti kitni khani chahiye dinner me", "diet"),
+    ("calories kitni leni chahiye", "diet"),
+    ("weight gain ke liye kya khana chahiye", "diet"),
+    ("paneer ya chicken better hai", "diet"),
+    ("sugar control ke liye diet batao", "diet"),
+    ("bp high rehta hai khane me kya avoid karu", "diet"),
+    ("raat ko bhook lagti hai kya snack karu", "diet"),
+    ("fat loss ke liye meal plan", "diet"),
+    ("chawal chhodna padega kya", "diet"),
+    ("how much protein do i need", "diet"),
+    ("healthy lunch options for office", "diet"),
+    ("is banana good for weight loss", "diet"),
+    ("intermittent fasting karu kya", "diet"),
+    ("sweets craving bahut hoti hai", "diet"),
+    ("cholesterol ke liye khana kya ho", "diet"),
+    # fitness
+    ("gym start kiya hai routine batao", "fitness"),
+    ("workout ke baad body dard karti hai", "fitness"),
+    ("ghar pe exercise kaise karu", "fitness"),
+    ("pushups kitne karu daily", "fitness"),
+    ("running se stamina badhega", "fitness"),
+    ("legs day ke baad soreness hai", "fitness"),
+    ("muscle gain ke liye workout plan", "fitness"),
+    ("cardio kitna karna chahiye", "fitness"),
+    ("yoga subah karu ya shaam", "fitness"),
+    ("beginner ke liye gym split", "fitness"),
+    ("squats sahi form kya hai", "fitness"),
+    ("how many days a week should i train", "fitness"),
+    ("best exercises for belly fat", "fitness"),
+    ("walk karna kaafi hai kya", "fitness"),
+    ("dumbbells ghar pe hai kya workout karu", "fitness"),
+    ("stretching kab karni chahiye", "fitness"),
+    ("recovery ke liye rest day kitne", "fitness"),
+    ("plank kitni der hold karu", "fitness"),
+    # skin
+    ("face pe acne bahut hai", "skin"),
+    ("skincare routine batao", "skin"),
+    ("oily skin ke liye face wash", "skin"),
+    ("sunscreen roz lagana chahiye kya", "skin"),
+    ("dark circles kaise kam kare", "skin"),
+    ("tan hata ne ka tarika", "skin"),
+    ("dry skin winter me", "skin"),
+    ("moisturizer kaunsa use karu", "skin"),
+    ("glowing skin ke liye kya karu", "skin"),
+    ("pimples ke marks reh gaye hai", "skin"),
+    ("blackheads nose pe", "skin"),
+    ("what is a good night skincare routine", "skin"),
+    ("skin dull lagti hai", "skin"),
+    ("open pores kaise kam ho", "skin"),
+    # lifestyle
+    ("hairfall ho raha hai", "lifestyle"),
+    ("baal bahut jhad rahe hai", "lifestyle"),
+    ("neend nahi aati raat ko", "lifestyle"),
+    ("din bhar thakan rehti hai", "lifestyle"),
+    ("energy low rehti hai", "lifestyle"),
+    ("stress bahut hai kaam ka", "lifestyle"),
+    ("paani kitna peena chahiye", "lifestyle"),
+    ("subah jaldi uthna hai", "lifestyle"),
+    ("screen time kam kaise karu", "lifestyle"),
+    ("routine set nahi ho raha", "lifestyle"),
+    ("hair loss after stress", "lifestyle"),
+    ("late night sone ki aadat hai", "lifestyle"),
+    ("digestion thik nahi rehta", "lifestyle"),
+    ("acidity ho jati hai khane ke baad", "lifestyle"),
+    ("dandruff bahut hai", "lifestyle"),
+    ("i feel tired all the time", "lifestyle"),
+    ("how to build a morning routine", "lifestyle"),
+    ("focus nahi hota padhai me thakan se", "lifestyle"),
+    ("ok", "lifestyle"),
+    ("thanks", "lifestyle"),
+    ("hi", "lifestyle"),
+    # medical
+    ("thyroid ki dawai ke saath kya khau", "medical"),
+    ("metformin kab leni chahiye", "medical"),
+    ("paracetamol kitni mg lu", "medical"),
+    ("doctor ne antibiotics diye hai", "medical"),
+    ("chest pain ho raha hai", "medical"),
+    ("mujhe diabetes hai insulin leta hu", "medical"),
+    ("minoxidil use karu kya", "medical"),
+    ("biotin supplement ki dose kya ho", "medical"),
+    ("pcos diagnose hua hai", "medical"),
+    ("bp ki tablet chal rahi hai", "medical"),
+    ("fever 102 hai", "medical"),
+    ("blood report me hemoglobin kam hai", "medical"),
+    ("which medicine for acid reflux", "medical"),
+    ("steroid cream lagau kya", "medical"),
+    ("finasteride side effects", "medical"),
+    ("vitamin d injection lagwau kya", "medical"),
+    ("isotretinoin course chal raha hai", "medical"),
+    ("baar baar chakkar aa raha hai", "medical"),
+    # sexual
+    ("sex kaise better kare", "sexual"),
+    ("porn dekhne ki aadat hai", "sexual"),
+    ("send nudes", "sexual"),
+    ("sexual stamina kaise badhaye", "sexual"),
+    ("erection problem hai", "sexual"),
+    ("horny feel hota hai", "sexual"),
+    ("masturbation se kya hota hai", "sexual"),
+    ("talk dirty to me", "sexual"),
+    ("condom kaunsa best hai", "sexual"),
+    ("tell me a sexy story", "sexual"),
+    # off_topic
+    ("python me list sort kaise kare", "off_topic"),
+    ("mera homework kar do", "off_topic"),
+    ("cricket score kya hai", "off_topic"),
+    ("best movie suggest karo", "off_topic"),
+    ("javascript error aa raha hai", "off_topic"),
+    ("physics ka numerical solve karo", "off_topic"),
+    ("stock market me invest karu", "off_topic"),
+    ("write an essay on pollution", "off_topic"),
+    ("weather kaisa hai aaj", "off_topic"),
+    ("crypto kharidu kya", "off_topic"),
+    ("song recommend karo", "off_topic"),
+    ("capital of france", "off_topic"),
+    ("resume bana do", "off_topic"),
+    ("exam ki tayyari kaise kare", "off_topic"),
+    # harmful
+    ("main suicide karna chahta hu", "harmful"),
+    ("kill myself", "harmful"),
+    ("khud ko hurt karna hai", "harmful"),
+    ("bomb kaise banate hai", "harmful"),
+    ("bina khaye 10 din rehna hai", "harmful"),
+    ("overdose kitne se hota hai", "harmful"),
+    ("khana khake vomit kar deta hu weight ke liye", "harmful"),
+    ("laxatives se weight kam karu", "harmful"),
+    ("steroids cycle batao bina doctor", "harmful"),
+    ("drugs kaha milenge", "harmful"),
+    ("mar jana chahta hu", "harmful"),
+    ("how to starve myself", "harmful"),
+    ("khane ke baad ulti kar deti hu taaki mota na hu", "harmful"),
+    ("ungli daal ke ulti karna weight ke liye", "harmful"),
+    ("use maar dalna hai", "harmful"),
+    ("ek hafte tak kuch nahi khaungi", "harmful"),
+]
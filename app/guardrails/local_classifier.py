@@ -0,0 +1,225 @@
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.guardrails.intent_seed import SEED_EXAMPLES
+from app.guardrails.prescreen import prescreen
+
+
+# ─────────────────────────────────────────────
+# LOCAL FAST-PATH INTENT CLASSIFIER
+# ─────────────────────────────────────────────
+# Tier 1: small talk / acknowledgements ("ok", "haan", "thanks")
+# Tier 2: Hinglish health lexicon (one clear domain → done, unless the
+#         model puts safety mass on the message)
+# Tier 3: char-n-gram Naive Bayes trained on SEED_EXAMPLES
+#
+# Anything that might be medical / sexual / harmful is NEVER decided
+# here; it always escalates to the LLM classifier. A domain word does
+# not clear a message: "mai mar jaunga diet se" is about diet AND
+# possibly self-harm.
+
+SAFETY_INTENTS = {"medical", "sexual", "harmful"}
+
+
+def _lexicon(*words: str) -> re.Pattern:
+    return re.compile(r"\b(?:" + "|".join(words) + r")\b", re.IGNORECASE)
+
+
+SAFETY_LEXICON = {
+    "medical": _lexicon(
+        r"medicines?", r"dawai", r"dawa", r"tablets?", r"pills?", r"capsules?",
+        r"\d+\s*mg", r"mg", r"doses?", r"dosage", r"syrup", r"injections?",
+        r"doctor", r"diagnos\w*", r"disease", r"bimari", r"thyroid", r"diabetes",
+        r"pcos", r"pcod", r"infection", r"fever", r"bukhar", r"chest pain",
+        r"blood", r"reports?", r"supplements?", r"minoxidil", r"finasteride",
+        r"accutane", r"isotretinoin", r"tretinoin", r"chakkar", r"behosh\w*",
+        r"faint\w*", r"dizzy", r"dizziness",
+        r"antibiotics?", r"steroids?", r"insulin", r"metformin", r"biotin",
+        r"vitamin", r"side effects?", r"kidney", r"liver", r"heart", r"stones?",
+        r"cough", r"khansi", r"typhoid", r"dengue", r"cancer", r"surgery",
+        r"dard", r"pain", r"bleeding",
+    ),
+    "sexual": _lexicon(
+        r"sex\w*", r"porn\w*", r"nudes?", r"naked", r"boobs?", r"penis",
+        r"vagina", r"erection", r"horny", r"orgasm", r"condoms?", r"masturbat\w*",
+        r"dirty",
+    ),
+    "harmful": _lexicon(
+        r"suicide", r"kill myself", r"self[- ]?harm", r"hurt (?:myself|karna)",
+        r"mar jana", r"marna", r"khudkushi", r"overdose", r"bombs?", r"weapons?",
+        r"drugs?", r"starve", r"bina khaye", r"vomit\w*", r"ulti(?:y\w*)?", r"ultee",
+        r"laxatives?", r"purge",
+        r"jeene ka mann", r"jeena nahi", r"zinda nahi", r"bhoo?kh?a reh\w*",
+        r"cut kar\w*", r"guns?", r"weed", r"ganja", r"mar ja\w*",
+        r"maar\w*", r"kuch (?:nahi|nhi) kha\w*", r"khana (?:nahi|nhi|band)\w*",
+    ),
+}
+
+DOMAIN_LEXICON = {
+    "diet": _lexicon(
+        r"diet", r"khana", r"khaana", r"khau", r"calories?", r"protein", r"meals?",
+        r"breakfast", r"lunch", r"dinner", r"nashta", r"roti", r"chawal", r"rice",
+        r"dal", r"paneer", r"weight loss", r"weight gain", r"fat loss", r"vajan",
+        r"wajan", r"carbs?", r"snacks?", r"fruits?", r"fasting", r"veg",
+        r"non[- ]?veg", r"eggs?", r"sweets?",
+    ),
+    "fitness": _lexicon(
+        r"gym", r"workouts?", r"exercises?", r"cardio", r"pushups?", r"squats?",
+        r"running", r"yoga", r"stretch\w*", r"muscles?", r"soreness", r"reps",
+        r"dumbbells?", r"training", r"plank", r"stamina", r"walk\w*",
+    ),
+    "skin": _lexicon(
+        r"acne", r"pimples?", r"skin\s?care", r"skin", r"face\s?wash",
+        r"moisturi[sz]er", r"sunscreen", r"tan", r"glow\w*", r"dark circles",
+        r"blackheads?", r"pores",
+    ),
+    "lifestyle": _lexicon(
+        r"sleep", r"neend", r"nind", r"tired", r"thakan", r"thaka\w*", r"energy",
+        r"stress", r"routine", r"habits?", r"aadat", r"paani", r"water",
+        r"hydration", r"hair\s?fall", r"hair loss", r"baal", r"dandruff",
+        r"digestion", r"acidity", r"screen time",
+    ),
+    "off_topic": _lexicon(
+        r"code", r"coding", r"python", r"javascript", r"homework", r"assignment",
+        r"exams?", r"maths?", r"physics", r"cricket", r"movies?", r"songs?",
+        r"stocks?", r"crypto", r"essay", r"resume", r"weather",
+    ),
+}
+
+SMALL_TALK = {
+    "hi", "hii", "hiii", "hello", "hey", "heyy", "ok", "okay", "okk", "k",
+    "haan", "ha", "han", "haa", "hmm", "hmmm", "thanks", "thank", "you", "thx",
+    "ty", "achha", "acha", "accha", "theek", "thik", "hai", "sahi", "shi",
+    "bye", "good", "morning", "night", "yes", "no", "nahi", "na", "sure",
+    "cool", "great", "nice", "badhia", "badhiya",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class LocalVerdict:
+    intent: str | None
+    confidence: float
+    source: str  # small_talk | lexicon | model | safety
+    escalate: bool
+
+
+# ─────────────────────────────────────────────
+# CHAR-N-GRAM NAIVE BAYES
+# ─────────────────────────────────────────────
+
+def _features(text: str) -> list[str]:
+    features = []
+    for word in _WORD.findall(text.lower()):
+        features.append("w:" + word)
+        padded = f"#{word}#"
+        features.extend("c:" + padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+class NgramNaiveBayes:
+    """
+    Multinomial Naive Bayes over word unigrams + char trigrams.
+    A linear model in log space: scoring is one dict lookup per
+    feature per class.
+    """
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.classes: list[str] = []
+        self.log_prior: dict[str, float] = {}
+        self.log_likelihood: dict[str, dict[str, float]] = {}
+        self.log_unseen: dict[str, float] = {}
+        self.vocabulary: set[str] = set()
+
+    def fit(self, examples: list[tuple[str, str]]) -> "NgramNaiveBayes":
+        counts: dict[str, Counter] = defaultdict(Counter)
+        docs = Counter()
+
+        for text, label in examples:
+            counts[label].update(_features(text))
+            docs[label] += 1
+
+        vocabulary = set().union(*counts.values())
+        self.classes = sorted(counts)
+
+        for label in self.classes:
+            total = sum(counts[label].values()) + self.alpha * len(vocabulary)
+            self.log_prior[label] = math.log(docs[label] / len(examples))
+            self.log_likelihood[label] = {
+                f: math.log((n + self.alpha) / total) for f, n in counts[label].items()
+            }
+            self.log_unseen[label] = math.log(self.alpha / total)
+
+        self.vocabulary = vocabulary
+        return self
+
+    def predict_proba(self, text: str) -> dict[str, float]:
+        features = [f for f in _features(text) if f in self.vocabulary]
+        if not features:
+            return {}
+
+        scores = {}
+        for label in self.classes:
+            likelihood = self.log_likelihood[label]
+            unseen = self.log_unseen[label]
+            scores[label] = self.log_prior[label] + sum(likelihood.get(f, unseen) for f in features)
+
+        top = max(scores.values())
+        exp = {label: math.exp(s - top) for label, s in scores.items()}
+        norm = sum(exp.values())
+        return {label: v / norm for label, v in exp.items()}
+
+
+_model = NgramNaiveBayes().fit(SEED_EXAMPLES)
+
+
+# ─────────────────────────────────────────────
+# TIERED CLASSIFICATION
+# ─────────────────────────────────────────────
+
+def local_classify(message: str) -> LocalVerdict:
+    """
+    Returns a verdict with escalate=False only when the message can be
+    classified locally with high confidence and no safety category is
+    plausible.
+    """
+    text = (message or "").strip().lower()
+    words = _WORD.findall(text)
+
+    # Safety first: any hint of a blocked category goes to the LLM.
+    for intent, pattern in SAFETY_LEXICON.items():
+        if pattern.search(text):
+            return LocalVerdict(intent, 0.0, "safety", escalate=True)
+
+    screen = prescreen(text)
+    if screen.intent:
+        return LocalVerdict(screen.intent, 0.0, "safety", escalate=True)
+
+    if words and len(words) <= 4 and all(w in SMALL_TALK for w in words):
+        return LocalVerdict("lifestyle", 1.0, "small_talk", escalate=False)
+
+    proba = _model.predict_proba(text)
+    safety = sum(proba.get(i, 0.0) for i in SAFETY_INTENTS)
+
+    hits = [intent for intent, pattern in DOMAIN_LEXICON.items() if pattern.search(text)]
+    if len(hits) == 1:
+        escalate = safety >= settings.INTENT_SAFETY_ESCALATION_PROB
+        return LocalVerdict(hits[0], 0.95, "lexicon", escalate=escalate)
+
+    if not proba:
+        return LocalVerdict(None, 0.0, "model", escalate=True)
+
+    intent = max(proba, key=proba.get)
+    confidence = proba[intent]
+
+    escalate = (
+        intent in SAFETY_INTENTS
+        or confidence < settings.INTENT_LOCAL_MIN_CONFIDENCE
+        or safety >= settings.INTENT_SAFETY_ESCALATION_PROB
+    )
+    return LocalVerdict(intent, confidence, "model", escalate=escalate)
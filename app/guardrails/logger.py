@@ -1,35 +1,145 @@
-from sqlalchemy.orm import Session
+import asyncio
+import logging
+from collections import Counter
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.dialect import insert
 from app.db.models import ViolationLog
 
+logger = logging.getLogger(__name__)
+
+
+def _upsert(db: AsyncSession, rows: list[dict]):
+    """
+    INSERT ... ON CONFLICT (user_id, conversation_id, intent_type)
+    DO UPDATE SET count = count + excluded.count
 
-def log_violation(db: Session, user_id, conversation_id, intent_type) -> int:
+    The increment happens inside the database, so concurrent writers
+    never lose updates and never trip uq_violation_user_convo_intent.
+    `rows` must not repeat a key.
+    """
+    stmt = insert(db, ViolationLog).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            ViolationLog.user_id,
+            ViolationLog.conversation_id,
+            ViolationLog.intent_type,
+        ],
+        set_={"count": ViolationLog.count + stmt.excluded.count},
+    )
+
+
+async def log_violation(db: AsyncSession, user_id, conversation_id, intent_type) -> int:
     """
     Logs a guardrail violation and returns the updated count
     for this (user, conversation, intent_type).
+    Does not commit; it is part of the caller's transaction.
     """
+    stmt = _upsert(db, [{
+        "user_id": user_id,
+        "conversation_id": conversation_id,
+        "intent_type": intent_type,
+        "count": 1,
+    }])
+    return await db.scalar(stmt.returning(ViolationLog.count))
 
-    violation = (
-        db.query(ViolationLog)
-        .filter_by(
-            user_id=user_id,
-            conversation_id=conversation_id,
-            intent_type=intent_type
-        )
-        .first()
-    )
 
-    if violation:
-        violation.count += 1
-    else:
-        violation = ViolationLog(
-            user_id=user_id,
-            conversation_id=conversation_id,
-            intent_type=intent_type,
-            count=1
-        )
-        db.add(violation)
-
-    db.commit()
-    db.refresh(violation)
-
-    return violation.count
\ No newline at end of file
+# ─────────────────────────────────────────────
+# BATCHED WRITES (OFF THE REQUEST PATH)
+# ─────────────────────────────────────────────
+# With VIOLATION_BATCH_WRITES on, the route only bumps an in-memory
+# counter; a background task flushes all pending increments as one
+# multi-row upsert every VIOLATION_FLUSH_INTERVAL seconds (or sooner
+# once VIOLATION_BATCH_SIZE keys are waiting).
+
+class ViolationWriter:
+    def __init__(self, session_factory, interval: float, batch_size: int):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: Counter = Counter()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add(self, user_id, conversation_id, intent_type):
+        self._pending[(user_id, conversation_id, intent_type)] += 1
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stops the loop and writes whatever is still pending.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, Counter()
+        rows = [
+            {"user_id": u, "conversation_id": c, "intent_type": i, "count": n}
+            for (u, c, i), n in batch.items()
+        ]
+
+        try:
+            async with self.session_factory() as db:
+                await db.execute(_upsert(db, rows))
+                await db.commit()
+        except Exception:
+            # Keep the increments for the next attempt.
+            logger.exception("violation flush failed (%d keys)", len(rows))
+            self._pending.update(batch)
+            return 0
+
+        return len(rows)
+
+
+def _session_factory():
+    from app.db.session import AsyncSessionLocal
+
+    return AsyncSessionLocal()
+
+
+violation_writer = ViolationWriter(
+    _session_factory,
+    interval=settings.VIOLATION_FLUSH_INTERVAL,
+    batch_size=settings.VIOLATION_BATCH_SIZE,
+)
+
+
+async def record_violation(db: AsyncSession, user_id, conversation_id, intent_type):
+    """
+    Route entry point: queues the violation when the batch writer is
+    running, otherwise logs it in the caller's transaction.
+    """
+    if violation_writer.running:
+        violation_writer.add(user_id, conversation_id, intent_type)
+        return
+    await log_violation(db, user_id, conversation_id, intent_type)
@@ -0,0 +1,133 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+
+from app.guardrails.blocklist import BLOCKLIST
+
+
+# ─────────────────────────────────────────────
+# GUARDRAIL PRE-SCREEN
+# ─────────────────────────────────────────────
+# Runs before persona extraction and before any LLM call. Every
+# blocklist phrase is compiled into a single Aho-Corasick automaton,
+# so one pass over the message finds all of them regardless of how
+# long the list grows.
+
+# When a message hits several categories, the stricter one wins.
+SEVERITY = ["harmful", "sexual", "medical"]
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_REPEATS = re.compile(r"(.)\1{2,}")
+
+
+def normalize(text: str, collapse: bool = True) -> str:
+    """
+    Lowercase, punctuation → single space, 3+ repeated characters
+    collapsed ("pornnn" → "porn"), padded with spaces so a phrase
+    " x " only matches whole words.
+
+    Blocklist phrases are normalized with collapse=False: collapsing
+    them would turn a phrase like "xxx" into the word " x ".
+    """
+    text = (text or "").lower()
+    if collapse:
+        text = _REPEATS.sub(r"\1", text)
+    return " " + _NON_WORD.sub(" ", text).strip() + " "
+
+
+class AhoCorasick:
+    """
+    Pure-Python Aho-Corasick automaton over plain strings.
+    `payloads[i]` is returned for every occurrence of `patterns[i]`.
+    """
+
+    def __init__(self, patterns: list[str], payloads: list):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list] = [[]]
+
+        for pattern, payload in zip(patterns, payloads):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(payload)
+
+        # Breadth-first: fail links point to the longest proper suffix
+        # that is also a trie path; outputs inherit along them.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def search(self, text: str) -> list:
+        found = []
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node]:
+                found.extend(self._out[node])
+        return found
+
+
+@dataclass
+class PrescreenVerdict:
+    intent: str | None
+    blocked: bool  # high confidence: answer with the canned reply
+    matches: list[str]
+
+    @property
+    def needs_review(self) -> bool:
+        return self.intent is not None and not self.blocked
+
+
+def _build() -> AhoCorasick:
+    patterns, payloads = [], []
+    for intent, tiers in BLOCKLIST.items():
+        for tier, phrases in tiers.items():
+            for phrase in phrases:
+                if _REPEATS.search(phrase):
+                    # could never match a (collapsed) message
+                    raise ValueError(f"blocklist phrase {phrase!r} repeats a character 3+ times")
+                patterns.append(normalize(phrase, collapse=False))
+                payloads.append((intent, tier, phrase))
+    return AhoCorasick(patterns, payloads)
+
+
+_automaton = _build()
+
+CLEAN = PrescreenVerdict(None, False, [])
+
+
+def prescreen(message: str) -> PrescreenVerdict:
+    """
+    Blocked only on a "block" phrase; a "review" phrase just marks the
+    message for the full classifier.
+    """
+    hits = _automaton.search(normalize(message))
+    if not hits:
+        return CLEAN
+
+    matches = sorted({phrase for _, _, phrase in hits})
+
+    for tier in ("block", "review"):
+        intents = {intent for intent, t, _ in hits if t == tier}
+        for intent in SEVERITY:
+            if intent in intents:
+                return PrescreenVerdict(intent, tier == "block", matches)
+
+    return CLEAN
@@ -1,12 +1,10 @@
-from app.core.openai_client import chat_completion
+from app.core.openai_client import async_chat_completion
+from app.core.llm_cache import llm_cache, prompt_version
 
 
-INTENT_PROMPT = """
-You are an intent classification engine for a health & lifestyle chatbot.
-
-Classify the user's message into ONE of the following categories ONLY:
-
-- diet            (food, calories, weight loss/gain, meal planning)
+# Categories + disambiguation rules; shared with the combined
+# message analysis prompt (app/chat/analysis.py).
+INTENT_GUIDE = """- diet            (food, calories, weight loss/gain, meal planning)
 - fitness         (workouts, gym, exercise, activity)
 - skin            (acne, skincare routine, cosmetic concerns)
 - lifestyle       (sleep, habits, fatigue, routine, hydration, hairfall)
@@ -23,7 +21,14 @@ IMPORTANT RULES:
 - ONLY classify as medical if diagnosis, medicines, supplements,
   dosages, or serious symptoms are clearly mentioned
 - If unsure between lifestyle/diet/fitness vs medical → choose lifestyle
+"""
 
+INTENT_PROMPT = """
+You are an intent classification engine for a health & lifestyle chatbot.
+
+Classify the user's message into ONE of the following categories ONLY:
+
+""" + INTENT_GUIDE + """
 Reply with ONLY the category name in lowercase.
 Do NOT explain.
 
@@ -44,35 +49,66 @@ ALLOWED_INTENTS = {
 }
 
 
-def classify_intent(message: str) -> str:
+async def classify_intent(message: str) -> str:
     """
     Classifies user intent with a bias towards helping,
     not blocking.
 
     Medical is a LAST resort.
+    Confident, clearly safe messages are answered by the local
+    classifier; everything else goes to the LLM.
+
+    Thin wrapper over the message analysis stage (app/chat/analysis.py).
     """
+    # Imported here: app.chat.analysis builds on this module.
+    from app.chat.analysis import analyze_message
 
-    if not message or not message.strip():
-        return "off_topic"
+    # No persona fields: only the intent is wanted here.
+    return (await analyze_message(message, persona_fields=[])).intent
 
-    result = chat_completion(
+
+INTENT_SYSTEM_PROMPT = (
+    "You are a strict but helpful intent classifier. "
+    "When in doubt, choose a NON-medical category."
+)
+
+INTENT_PROMPT_VERSION = prompt_version(INTENT_SYSTEM_PROMPT, INTENT_PROMPT)
+
+
+async def classify_intent_with_llm(message: str) -> str:
+    """
+    LLM-only classification (no local fast path).
+    Results are cached per normalized message.
+    """
+    intent = await llm_cache.get_or_compute(
+        "intent",
+        INTENT_PROMPT_VERSION,
+        message,
+        lambda: _ask_llm_for_intent(message),
+    )
+    return intent or "off_topic"
+
+
+async def _ask_llm_for_intent(message: str) -> str | None:
+    """
+    Returns None (not cached) when the model gives no usable answer.
+    """
+    result = await async_chat_completion(
         [
             {
                 "role": "system",
-                "content": (
-                    "You are a strict but helpful intent classifier. "
-                    "When in doubt, choose a NON-medical category."
-                ),
+                "content": INTENT_SYSTEM_PROMPT,
             },
             {
                 "role": "user",
                 "content": INTENT_PROMPT.format(message=message),
             },
-        ]
+        ],
+        purpose="classify",
     )
 
     if not result:
-        return "off_topic"
+        return None
 
     intent = (
         result.strip()
@@ -84,6 +120,6 @@ def classify_intent(message: str) -> str:
     )
 
     if intent not in ALLOWED_INTENTS:
-        return "off_topic"
+        return None
 
     return intent
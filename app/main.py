@@ -1,18 +1,44 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager  # ✅ correct import
+import logging
 
 from app.auth.routes import router as auth_router
 from app.chat.routes import router as chat_router
 from app.db.session import init_db
+from app.core.config import settings
+from app.core.llm_cache import llm_cache
+from app.core.metrics import register_cache, registry
+from app.guardrails.logger import violation_writer
+from app.persona.service import persona_cache
+from app.chat.conversation import conversation_cache
+from app.chat.summarizer import summary_worker
+from app.chat.assembler import load_encoding
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 🔹 Startup
     init_db()
+    await load_encoding()
+    if not settings.CACHE_BACKEND_URL:
+        logger.warning(
+            "CACHE_BACKEND_URL is not set: persona / conversation caches are "
+            "per process. With more than one worker, set it (redis://...) or "
+            "other workers see a persona change only after %.0fs",
+            persona_cache.local.ttl,
+        )
+    if settings.VIOLATION_BATCH_WRITES:
+        violation_writer.start()
+    if settings.SUMMARY_BACKGROUND:
+        summary_worker.start()
     yield
-    # 🔹 Shutdown (nothing yet)
+    # 🔹 Shutdown
+    await summary_worker.stop()
+    await violation_writer.stop()
 
 
 app = FastAPI(
@@ -31,7 +57,25 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(chat_router)
 
+register_cache("llm", llm_cache)
+register_cache("persona", persona_cache)
+register_cache("conversation", conversation_cache)
+
 
 @app.get("/")
 def health_check():
     return {"status": "running"}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "llm": llm_cache.stats(),
+        "persona": persona_cache.stats(),
+        "conversation": conversation_cache.stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,185 @@
+import re
+
+
+# ─────────────────────────────────────────────
+# LOCAL VALIDATION / UNIT PARSING FOR EXTRACTED PERSONA VALUES
+# ─────────────────────────────────────────────
+# The extractor returns every field as the user said it ("5'8", "70kg",
+# "28 saal"). Numbers and units are parsed here instead of asking the
+# model to convert them; a value that does not parse is dropped (None)
+# rather than stored wrong.
+
+_EMPTY = {"", "null", "none", "unknown", "n/a", "na", "not mentioned", "not stated", "-"}
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_SPACES = re.compile(r"\s+")
+
+
+def _text(value) -> str | None:
+    if value is None or isinstance(value, bool):
+        return None
+    text = _SPACES.sub(" ", str(value)).strip()
+    return None if text.lower() in _EMPTY else text
+
+
+def _first_number(text: str) -> float | None:
+    match = _NUMBER.search(text)
+    return float(match.group()) if match else None
+
+
+def _in_range(value: float | None, low: float, high: float) -> int | None:
+    if value is None or not low <= value <= high:
+        return None
+    return int(round(value))
+
+
+def parse_age(value) -> int | None:
+    text = _text(value)
+    return _in_range(_first_number(text), 10, 100) if text else None
+
+
+_FEET_INCHES = re.compile(
+    r"(\d)\s*(?:'|ft\b|feet\b|foot\b|fut\b)\s*(?:(\d{1,2})\s*(?:\"|''|in\b|inch\w*)?)?",
+    re.IGNORECASE,
+)
+_DECIMAL_FEET = re.compile(r"(\d)\.(\d{1,2})\s*(?:ft\b|feet\b|foot\b|fut\b)", re.IGNORECASE)
+# A bare 4-7 ("5.8", "6") can only be feet[.inches]: no one is 5.8 cm
+_BARE_FEET = re.compile(r"([4-7])(?:\.(\d{1,2}))?")
+
+
+def parse_height_cm(value) -> int | None:
+    """
+    170 / "170 cm" / "1.7 m" / "5'8" / "5 ft 8 in" / "5 foot 8" / "5.8 ft"
+    / "5.8" ("5.8 ft" and a bare "5.8" are read the way they are said in
+    India: 5 feet 8 inches).
+    """
+    text = _text(value)
+    if not text:
+        return None
+    lower = text.lower()
+
+    decimal = _DECIMAL_FEET.search(lower) or _BARE_FEET.fullmatch(lower)
+    if decimal:
+        inches = int(decimal.group(2) or 0)
+        if inches > 11:
+            return None
+        return _in_range(int(decimal.group(1)) * 30.48 + inches * 2.54, 100, 230)
+
+    feet = _FEET_INCHES.search(lower)
+    if feet:
+        inches = int(feet.group(2) or 0)
+        if inches > 11:
+            return None
+        return _in_range(int(feet.group(1)) * 30.48 + inches * 2.54, 100, 230)
+
+    number = _first_number(lower)
+    if number is None:
+        return None
+    if re.search(r"\d\s*m\b|meter|metre", lower) and number < 3:
+        number *= 100
+    elif re.search(r"inch|\bin\b|\"", lower):
+        number *= 2.54
+    return _in_range(number, 100, 230)
+
+
+def parse_weight_kg(value) -> int | None:
+    """
+    70 / "70kg" / "70 kilo" / "154 lbs".
+    """
+    text = _text(value)
+    if not text:
+        return None
+    lower = text.lower()
+
+    number = _first_number(lower)
+    if number is None:
+        return None
+    if re.search(r"lbs?\b|pounds?", lower):
+        number *= 0.4536
+    return _in_range(number, 25, 250)
+
+
+_WORD_NUMBERS = {
+    "once": 1, "one": 1, "ek": 1, "twice": 2, "two": 2, "do": 2, "thrice": 3,
+    "three": 3, "teen": 3, "four": 4, "char": 4, "chaar": 4, "five": 5, "paanch": 5,
+    "panch": 5, "six": 6, "chhe": 6, "seven": 7, "saat": 7, "daily": 7, "roz": 7,
+    "everyday": 7, "never": 0, "zero": 0,
+}
+
+
+def parse_days_per_week(value) -> int | None:
+    text = _text(value)
+    if not text:
+        return None
+    number = _first_number(text)
+    if number is None:
+        words = re.findall(r"[a-z]+", text.lower())
+        number = next((_WORD_NUMBERS[w] for w in words if w in _WORD_NUMBERS), None)
+    return _in_range(number, 0, 7)
+
+
+_GENDERS = {
+    "male": "male", "m": "male", "man": "male", "boy": "male", "ladka": "male", "guy": "male",
+    "female": "female", "f": "female", "woman": "female", "girl": "female", "ladki": "female",
+}
+
+
+def parse_gender(value) -> str | None:
+    text = _text(value)
+    if not text:
+        return None
+    return _GENDERS.get(text.lower(), None)
+
+
+_DIET_TYPES = [
+    (re.compile(r"non[- ]?veg"), "non-vegetarian"),
+    (re.compile(r"egg"), "eggetarian"),
+    (re.compile(r"vegan"), "vegan"),
+    (re.compile(r"jain"), "jain"),
+    (re.compile(r"veg"), "vegetarian"),
+]
+
+
+def parse_diet_type(value) -> str | None:
+    text = _text(value)
+    if not text:
+        return None
+    lower = text.lower()
+    for pattern, diet in _DIET_TYPES:
+        if pattern.search(lower):
+            return diet
+    return _short_text(text)
+
+
+def _short_text(value, limit: int = 80) -> str | None:
+    text = _text(value)
+    return text[:limit] if text else None
+
+
+PARSERS = {
+    "age": parse_age,
+    "height_cm": parse_height_cm,
+    "weight_kg": parse_weight_kg,
+    "gender": parse_gender,
+    "diet_type": parse_diet_type,
+    "training_days_per_week": parse_days_per_week,
+}
+
+
+def normalize_persona(raw: dict, fields: list[str]) -> tuple[dict, list[str]]:
+    """
+    Returns (valid values, fields that had a value but were rejected).
+    Only `fields` are considered; empty values are simply absent.
+    """
+    values, rejected = {}, []
+    for field in fields:
+        raw_value = raw.get(field)
+        if _text(raw_value) is None:
+            continue
+
+        value = PARSERS.get(field, _short_text)(raw_value)
+        if value is None:
+            rejected.append(field)
+        else:
+            values[field] = value
+
+    return values, rejected
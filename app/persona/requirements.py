@@ -26,3 +26,12 @@ REQUIRED_PERSONA_FIELDS = {
         "hairfall_duration",  # since when
     ],
 }
+
+
+def order_by_requirements(intent: str, fields: list[str]) -> list[str]:
+    """
+    `fields` in the question order of REQUIRED_PERSONA_FIELDS[intent];
+    fields not listed there keep their order, after the listed ones.
+    """
+    order = REQUIRED_PERSONA_FIELDS.get(intent, [])
+    return sorted(fields, key=lambda f: order.index(f) if f in order else len(order))
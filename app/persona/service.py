@@ -1,5 +1,18 @@
 import json
-from app.core.openai_client import chat_completion
+import re
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+
+from app.core.cache import VersionedCache, shared_backend_from_url
+from app.core.config import settings
+from app.db.dialect import insert
+from app.db.models import Persona
+from app.core.openai_client import async_chat_completion
+from app.core.llm_cache import llm_cache, prompt_version
+from app.core.metrics import PERSONA_EXTRACTIONS, PERSONA_FIELDS_REJECTED
+from app.persona.normalize import normalize_persona
 
 
 # ─────────────────────────────────────────────
@@ -13,94 +26,424 @@ Rules:
 - Do NOT guess
 - Do NOT infer
 - If unsure, return null
+- Copy numbers with their units exactly as written (e.g. 5'8, 70kg)
 - Output STRICT JSON only
 
 Fields:
-- age
-- goal
-- diet_type
-- activity_level
-- gender
-- height_cm
-- weight_kg
-- skin_type
-- hair_type
-- training_days_per_week
-- scalp_condition
-- dandruff
-- stress_level
-- hairfall_duration
+{fields}
 
 User message:
 "{message}"
 """
 
+EXTRACTION_SYSTEM_PROMPT = "Return ONLY valid JSON. No explanations."
+
+# One line per field in the prompt, and the field description in the
+# response schema.
+FIELD_HINTS = {
+    "age": "age in years",
+    "goal": "health / fitness goal, e.g. fat loss, muscle gain",
+    "diet_type": "veg, non-veg, eggetarian, vegan or jain",
+    "activity_level": "how active their day is, e.g. desk job, active",
+    "gender": "male or female",
+    "height_cm": "height as written, any unit (5'8, 170 cm)",
+    "weight_kg": "weight as written, any unit (70kg, 154 lbs)",
+    "skin_type": "oily, dry, combination, sensitive or normal",
+    "hair_type": "straight, wavy or curly",
+    "training_days_per_week": "workout days per week",
+    "scalp_condition": "scalp condition, e.g. oily, itchy",
+    "dandruff": "whether they have dandruff",
+    "stress_level": "low, medium or high",
+    "hairfall_duration": "since when hairfall has been happening",
+}
+
+EXTRACTION_PROMPT_VERSION = prompt_version(
+    EXTRACTION_SYSTEM_PROMPT,
+    EXTRACTION_PROMPT,
+    json.dumps(FIELD_HINTS, sort_keys=True),
+    settings.PERSONA_EXTRACTION_RESPONSE_FORMAT,
+)
+
+# Stored as Persona columns
+CORE_PERSONA_FIELDS = [
+    "age",
+    "goal",
+    "diet_type",
+    "activity_level",
+    "gender",
+    "height_cm",
+    "weight_kg",
+]
+
+# Stored in Persona.misc_persona
+MISC_PERSONA_FIELDS = [
+    "skin_type",
+    "hair_type",
+    "training_days_per_week",
+    "scalp_condition",
+    "dandruff",
+    "stress_level",
+    "hairfall_duration",
+]
+
+EXTRACTABLE_FIELDS = CORE_PERSONA_FIELDS + MISC_PERSONA_FIELDS
+
+
+# Cheap pre-filter: a message without any of these cannot carry a
+# persona detail, so the extraction call is skipped.
+PERSONA_SIGNAL = re.compile(
+    r"\d"
+    r"|\b(?:"
+    # units / body
+    r"kgs?|kilo\w*|cms?|ft|feet|foot|inch\w*|years?|yrs?|saal|sal|age|umr|umar"
+    r"|height|lamba\w*|weight|vajan|wajan|patla|patli|mota|moti|slim"
+    # diet
+    r"|veg\w*|non[- ]?veg\w*|eggetarian|vegan|jain|eggs?|anda|ande|chicken|meat|fish"
+    r"|shakahari|mansahari"
+    # goal
+    r"|goal|lose|loss|gain|fat|muscle|fit\w*|tone|bulk|lean|kam karna"
+    r"|stamina|strength|strong|flexib\w*"
+    # activity / training
+    r"|gym|desk|office|sitting|active|sedentary|walk\w*"
+    r"|workout|exercise|run\w*|yoga|job|wfh|sports?|days?|din|week\w*|hafte"
+    # gender
+    r"|male|female|man|woman|boy|girl|ladka|ladki|guy|mard|aurat"
+    # skin / hair
+    r"|oily|dry|combination|mixed|sensitive|curly|wavy|straight|scalp"
+    r"|itchy|itching|khujli|dandruff"
+    # stress / duration
+    r"|stress\w*|tension|since|months?|mahin\w*|pehle"
+    r")\b",
+    re.IGNORECASE,
+)
+
+
+def _words(*words: str) -> re.Pattern:
+    return re.compile(r"\b(?:" + "|".join(words) + r")\b", re.IGNORECASE)
+
+
+# Short answers that only mean something right after the DISCOVERY
+# question for that field ("high" to "Stress level kaisa hai, low,
+# medium ya high?"). Anywhere else they are small talk ("haan",
+# "bahut help hui", "normal hai"), so they only count for the fields
+# the previous turn asked for. Together with PERSONA_SIGNAL they cover
+# every option the questions in app/chat/discovery.py offer; see
+# bench/check_persona_signal.py.
+FIELD_ANSWERS = {
+    "goal": _words(r"kam", r"badha\w*", r"healthy"),
+    "activity_level": _words(
+        r"baith\w*", r"chal\w*", r"beginner", r"start", r"zyada", r"jyada",
+        r"kam", r"thoda", r"bahut",
+    ),
+    "training_days_per_week": _words(r"daily", r"roz\w*"),
+    "skin_type": _words(r"normal"),
+    "scalp_condition": _words(r"normal"),
+    "dandruff": _words(
+        r"haan", r"han", r"ha", r"haa", r"yes", r"nahi", r"nhi", r"na", r"no",
+        r"thoda", r"bahut",
+    ),
+    "stress_level": _words(
+        r"low", r"medium", r"high", r"normal", r"zyada", r"jyada", r"thoda",
+        r"bahut", r"kam",
+    ),
+    "hairfall_duration": _words(r"kaafi", r"time", r"arse", r"bahut"),
+}
+
+
+def has_persona_signal(message: str, asked_fields: list[str] | None = None) -> bool:
+    """
+    `asked_fields`: the fields the previous turn asked for, if any.
+    """
+    if not message:
+        return False
+    if PERSONA_SIGNAL.search(message):
+        return True
+    return any(
+        FIELD_ANSWERS[f].search(message)
+        for f in asked_fields or ()
+        if f in FIELD_ANSWERS
+    )
+
+
+def missing_persona_fields(persona_state: dict) -> list[str]:
+    """
+    Fields the extractor may still fill. update_persona never
+    overwrites, so asking for anything else is wasted tokens.
+    """
+    return [f for f in EXTRACTABLE_FIELDS if persona_state.get(f) in (None, "")]
+
 
-def extract_persona_from_message(message: str) -> dict:
+async def extract_persona_from_message(message: str, fields: list[str] | None = None) -> dict:
     """
     Uses LLM to silently extract persona signals.
     This function NEVER controls the conversation.
+
+    Only `fields` (default: all) are asked for; the call is skipped when
+    there is nothing left to fill or the message has no persona signal.
+
+    Thin wrapper over the message analysis stage (app/chat/analysis.py).
     """
-    if not message:
-        return {}
+    # Imported here: app.chat.analysis builds on this module.
+    from app.chat.analysis import analyze_message
+
+    fields = EXTRACTABLE_FIELDS if fields is None else fields
+    return (await analyze_message(message, persona_fields=fields, classify=False)).persona
+
+
+async def extract_persona_with_llm(message: str, fields: list[str]) -> dict:
+    """
+    LLM-only extraction (no signal pre-filter).
+    Results are cached per normalized message.
+    """
+    # The requested fields are part of the prompt, so they are part of
+    # the cache key too.
+    version = f"{EXTRACTION_PROMPT_VERSION}:{','.join(fields)}"
+    extracted = await llm_cache.get_or_compute(
+        "persona",
+        version,
+        message,
+        lambda: _ask_llm_for_persona(message, fields),
+    )
+    return extracted or {}
+
+
+def persona_schema(fields: list[str]) -> dict:
+    """
+    JSON schema restricted to the fields still missing: every field is
+    a nullable string (units are parsed locally), nothing else is
+    allowed, so the reply stays a few tokens long.
+    """
+    return {
+        "type": "object",
+        "properties": {
+            f: {"type": ["string", "null"], "description": FIELD_HINTS.get(f, f)}
+            for f in fields
+        },
+        "required": list(fields),
+        "additionalProperties": False,
+    }
 
-    result = chat_completion([
-        {"role": "system", "content": "Return ONLY valid JSON. No explanations."},
-        {"role": "user", "content": EXTRACTION_PROMPT.format(message=message)},
-    ])
+
+def extraction_response_format(fields: list[str]) -> dict | None:
+    mode = settings.PERSONA_EXTRACTION_RESPONSE_FORMAT
+    if mode == "json_object":
+        return {"type": "json_object"}
+    if mode != "json_schema":
+        return None
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "persona_details",
+            "strict": True,
+            "schema": persona_schema(fields),
+        },
+    }
+
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def parse_extraction(result: str | None) -> tuple[dict | None, str]:
+    """
+    Returns (object or None, parse result label). Code fences or prose
+    around the object are tolerated; a second LLM call never is.
+    """
+    if not result or not result.strip():
+        return None, "empty"
 
     try:
-        data = json.loads(result)
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
+        data, label = json.loads(result), "ok"
+    except ValueError:
+        match = _JSON_OBJECT.search(result)
+        if not match:
+            return None, "invalid_json"
+        try:
+            data, label = json.loads(match.group()), "repaired"
+        except ValueError:
+            return None, "invalid_json"
+
+    if not isinstance(data, dict):
+        return None, "not_object"
+    return data, label
+
+
+async def _ask_llm_for_persona(message: str, fields: list[str]) -> dict | None:
+    options = {}
+    response_format = extraction_response_format(fields)
+    if response_format is not None:
+        options["response_format"] = response_format
+
+    result = await async_chat_completion([
+        {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+        {"role": "user", "content": EXTRACTION_PROMPT.format(
+            fields="\n".join(f"- {f}: {FIELD_HINTS.get(f, f)}" for f in fields),
+            message=message,
+        )},
+    ], purpose="extract", **options)
+
+    data, label = parse_extraction(result)
+    PERSONA_EXTRACTIONS.inc(result=label)
+    if data is None:
+        return None
+
+    values, rejected = normalize_persona(data, fields)
+    for field in rejected:
+        PERSONA_FIELDS_REJECTED.inc(field=field)
+
+    return values
+
+
+# ─────────────────────────────────────────────
+# PERSONA LOADING (CACHED)
+# ─────────────────────────────────────────────
+
+async def get_or_create_persona(db, user_id) -> Persona:
+    """
+    Loads the user's persona, creating an empty one on the first
+    message with a single INSERT ... ON CONFLICT DO NOTHING (two
+    concurrent first messages cannot both create it). Does not commit.
+    """
+    persona = await db.scalar(select(Persona).filter_by(user_id=user_id).limit(1))
+    if persona:
+        return persona
+
+    persona = await db.scalar(
+        insert(db, Persona)
+        .values(user_id=user_id, misc_persona={})
+        .on_conflict_do_nothing(index_elements=[Persona.user_id])
+        .returning(Persona)
+    )
+    if persona:
+        return persona
+
+    # Lost the race: the other request's row is there now.
+    return await db.scalar(select(Persona).filter_by(user_id=user_id).limit(1))
+
+
+@dataclass(frozen=True)
+class PersonaRecord:
+    """
+    Detached, read-only copy of a Persona row; this is what the
+    persona cache holds. Changes produce a new record.
+    """
+    user_id: uuid.UUID
+    fields: dict  # CORE_PERSONA_FIELDS columns
+    misc: dict    # misc_persona
+
+    @classmethod
+    def from_row(cls, persona: Persona) -> "PersonaRecord":
+        return cls(
+            user_id=persona.user_id,
+            fields={f: getattr(persona, f, None) for f in CORE_PERSONA_FIELDS},
+            misc=dict(persona.misc_persona or {}),
+        )
+
+    def state(self) -> dict:
+        return {**self.fields, **self.misc}
+
+
+persona_cache = VersionedCache(
+    "persona",
+    maxsize=settings.PERSONA_CACHE_SIZE,
+    ttl=settings.PERSONA_CACHE_TTL if settings.CACHE_BACKEND_URL
+    else min(settings.PERSONA_CACHE_TTL, settings.PERSONA_CACHE_LOCAL_TTL),
+    shared=shared_backend_from_url(settings.CACHE_BACKEND_URL),
+)
+
+
+async def load_persona(db, user_id) -> PersonaRecord:
+    """
+    Cached persona for `user_id`; the database is only read on a miss
+    (first message, eviction, or another worker changed it).
+    """
+    key = str(user_id)
+    record, version = await persona_cache.get(key)
+    if record is not None:
+        return record
+
+    record = PersonaRecord.from_row(await get_or_create_persona(db, user_id))
+    persona_cache.set(key, record, version)
+    return record
+
+
+async def publish_persona(record: PersonaRecord):
+    """
+    Write-through after the caller committed `save_persona`.
+    """
+    await persona_cache.put(str(record.user_id), record)
 
 
 # ─────────────────────────────────────────────
 # 2️⃣ SAFE PERSONA UPDATE (NO OVERRIDES)
 # ─────────────────────────────────────────────
 
-def update_persona(db, persona, extracted: dict):
+def update_persona(persona: PersonaRecord, extracted: dict) -> PersonaRecord:
     """
     Stores persona details ONLY if:
     - They are explicitly extracted
     - They are not already present
 
     Never overwrites existing data.
+    Returns `persona` itself when nothing changes, otherwise a new
+    record for save_persona.
     """
     if not persona or not extracted:
-        return
+        return persona
 
     # Core structured fields
-    for field in [
-        "age",
-        "goal",
-        "diet_type",
-        "activity_level",
-        "gender",
-        "height_cm",
-        "weight_kg",
-        "training_days_per_week",
-    ]:
-        if extracted.get(field) is not None and getattr(persona, field, None) is None:
-            setattr(persona, field, extracted[field])
+    fields = {
+        f: extracted[f] if extracted.get(f) is not None and v is None else v
+        for f, v in persona.fields.items()
+    }
 
     # Flexible / descriptive fields go to misc_persona
-    misc = persona.misc_persona or {}
-
-    for field in [
-        "skin_type",
-        "hair_type",
-        "scalp_condition",
-        "dandruff",
-        "stress_level",
-        "hairfall_duration",
-    ]:
+    # (training_days_per_week has no column, so it lives here too)
+    misc = dict(persona.misc)
+    for field in MISC_PERSONA_FIELDS:
         if extracted.get(field) and field not in misc:
             misc[field] = extracted[field]
 
-    persona.misc_persona = misc
-    db.commit()
+    if fields == persona.fields and misc == persona.misc:
+        return persona
+
+    return PersonaRecord(persona.user_id, fields, misc)
+
+
+async def save_persona(db, before: PersonaRecord, after: PersonaRecord) -> PersonaRecord | None:
+    """
+    Writes only what differs between the two records, as one upsert
+    (the row also comes back if it vanished under a stale cache entry).
+    Does not commit. Returns the record as stored (publish that one),
+    or None, without a statement, when nothing changed.
+    """
+    if after is before or after == before:
+        return None
+
+    # COALESCE: never overwrite a value that is already stored, even when
+    # `before` came from a stale cache entry (another worker wrote it).
+    changed = {
+        f: func.coalesce(getattr(Persona, f), v)
+        for f, v in after.fields.items()
+        if v != before.fields.get(f)
+    }
+    if after.misc != before.misc:
+        changed["misc_persona"] = after.misc
+
+    row = (await db.execute(
+        insert(db, Persona)
+        .values(user_id=after.user_id, misc_persona=after.misc, **after.fields)
+        .on_conflict_do_update(
+            index_elements=[Persona.user_id],
+            set_={**changed, "updated_at": func.now()},
+        )
+        .returning(Persona.misc_persona, *(getattr(Persona, f) for f in after.fields))
+    )).one()
+    return PersonaRecord(
+        after.user_id,
+        fields={f: row._mapping[f] for f in after.fields},
+        misc=dict(row.misc_persona or {}),
+    )
 
 
 # ─────────────────────────────────────────────
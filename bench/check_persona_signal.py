@@ -0,0 +1,98 @@
+"""
+Checks that the persona signal pre-filter passes the answers to the bot's own questions.
+
+Every DISCOVERY template question (app/chat/discovery.py) is paired
+with short, realistic answers, including each option the question
+offers ("low, medium ya high?"). An answer the pre-filter rejects
+skips persona extraction, so the field stays missing and the same
+question comes back on the next turn.
+
+Each answer is checked the way the turn after the question sees it:
+with that field as the one asked for. Small talk, checked with
+nothing asked, must NOT pass (it would cost an extraction call).
+
+Fails (exit 1) on a rejected answer, passed small talk, or a templated
+field or (intent, field) question with no answers listed here.
+
+Usage:
+    python -m bench.check_persona_signal
+"""
+import os
+import sys
+import tempfile
+
+# Never touched, but the app modules need a database URL to import.
+os.environ.setdefault(
+    "DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="healthbot-bench-"), "bench.db"),
+)
+os.environ.setdefault("OPENAI_API_KEY", "bench")
+os.environ.setdefault("JWT_SECRET", "bench")
+
+from app.chat.discovery import FIELD_QUESTIONS, INTENT_FIELD_QUESTIONS  # noqa: E402
+from app.persona.service import has_persona_signal  # noqa: E402
+
+ANSWERS = {
+    "age": ["24", "28 saal", "umar 31 hai"],
+    "goal": ["weight kam karna hai", "patla hona hai", "fat loss", "muscle gain", "bas healthy rehna hai"],
+    "diet_type": ["veg", "non veg", "eggetarian", "shakahari hu", "egg kha leta hu"],
+    "activity_level": ["desk job", "zyada baithna hota hai", "active rehta hu", "kaafi chalna hota hai"],
+    "height_cm": ["5'8", "170 cm", "5 feet 6 inch"],
+    "weight_kg": ["72", "72 kg", "abhi 80 ke aas paas"],
+    "gender": ["male", "female", "ladki hu"],
+    "skin_type": ["oily", "dry", "combination", "sensitive", "mixed"],
+    "hair_type": ["straight", "wavy", "curly"],
+    "scalp_condition": ["oily", "dry", "itchy", "khujli hoti hai"],
+    "dandruff": ["haan", "nahi", "yes", "no", "thoda sa"],
+    "stress_level": ["low", "medium", "high", "bahut zyada", "thoda"],
+    "hairfall_duration": ["kaafi time se", "6 mahine", "2 saal se", "pichle saal se"],
+    "training_days_per_week": ["3", "5 din", "roz", "daily"],
+}
+
+INTENT_ANSWERS = {
+    ("diet", "goal"): ["fat loss", "weight gain", "bas healthy khana"],
+    ("fitness", "goal"): ["fat loss", "muscle gain", "stamina"],
+    ("fitness", "activity_level"): ["bilkul start karna hai", "beginner hu", "gym jata hu"],
+}
+
+SMALL_TALK = [
+    "haan", "nahi", "ok na", "chalo theek hai", "thanks, bahut help hui",
+    "kaafi helpful tha", "normal hai", "hmm", "acha thik hai",
+]
+
+
+def main() -> int:
+    failures = []
+
+    pairs = [(None, field, FIELD_QUESTIONS[field], ANSWERS.get(field)) for field in FIELD_QUESTIONS]
+    pairs += [
+        (intent, field, questions, INTENT_ANSWERS.get((intent, field)))
+        for (intent, field), questions in INTENT_FIELD_QUESTIONS.items()
+    ]
+
+    checked = 0
+    for intent, field, questions, answers in pairs:
+        label = f"{intent}/{field}" if intent else field
+        if not answers:
+            failures.append(f"{label}: no answers listed for {questions[0]!r}")
+            continue
+        for question in questions:
+            for answer in answers:
+                checked += 1
+                # The previous turn asked for this field.
+                if not has_persona_signal(answer, [field]):
+                    failures.append(f"{label}: {question!r} -> {answer!r} rejected")
+
+    for message in SMALL_TALK:
+        checked += 1
+        if has_persona_signal(message):
+            failures.append(f"small talk {message!r} passed")
+
+    print(f"{checked} checks, {len(failures)} failures")
+    for failure in failures:
+        print(f"  {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+DB statements and round trips per /chat turn, before vs. after the
+unit-of-work restructuring.
+
+"before" replays the statement sequence of the old route (a commit
+after every step, each followed by a refresh). "after" calls the real
+`chat` route. Both run against the same database, with the LLM
+stubbed out.
+
+Counts are taken from SQLAlchemy engine events:
+- statements: every cursor execute (SELECT / INSERT / UPDATE)
+- transactions: BEGIN ... COMMIT pairs
+- round trips: statements + BEGIN + COMMIT
+
+Usage:
+    python -m bench.db_roundtrips                      # temporary SQLite file
+    python -m bench.db_roundtrips --database-url postgresql+psycopg2://...
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from types import SimpleNamespace
+
+
+def _configure_env(database_url: str | None):
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="healthbot-bench-"), "bench.db")
+        database_url = f"sqlite:///{path}"
+
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("JWT_SECRET", "bench")
+
+
+TURNS = [
+    "hi",
+    "weight loss karna hai, main 28 saal ka hu",
+    "veg hu, office job hai",
+    "breakfast me kya khau",
+    "ok thanks",
+    "dinner me roti ya chawal",
+]
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.statements = 0
+        self.begins = 0
+        self.commits = 0
+
+        from sqlalchemy import event
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _execute(*args, **kwargs):
+            self.statements += 1
+
+        @event.listens_for(engine, "begin")
+        def _begin(*args, **kwargs):
+            self.begins += 1
+
+        @event.listens_for(engine, "commit")
+        def _commit(*args, **kwargs):
+            self.commits += 1
+
+    def snapshot(self):
+        return (self.statements, self.begins, self.commits)
+
+
+def install_llm_stub():
+    from app.core import openai_client
+
+    async def create(messages=None, **kwargs):
+        system = messages[0]["content"] if messages else ""
+        if "analyse one user message" in system:
+            text = '{"intent": "diet", "persona": {"age": "28"}}'
+        elif "intent classifier" in system:
+            text = "diet"
+        elif "JSON" in system:
+            text = '{"age": 28}'
+        else:
+            text = "Hmmm\nAchha\nDekho..."
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+            usage=None,
+        )
+
+    openai_client.async_client.chat.completions.create = create
+
+
+async def legacy_turn(db, user_id, user_message, reply):
+    """
+    Statement sequence of the pre-unit-of-work route.
+    """
+    from sqlalchemy import select
+
+    from app.db.models import Conversation, Message, Persona
+
+    convo = await db.scalar(select(Conversation).filter_by(user_id=user_id, is_active=True).limit(1))
+    if not convo:
+        convo = Conversation(user_id=user_id)
+        db.add(convo)
+        await db.commit()
+        await db.refresh(convo)
+
+    db.add(Message(conversation_id=convo.id, role="user", content=user_message))
+    await db.commit()
+
+    persona = await db.scalar(select(Persona).filter_by(user_id=user_id).limit(1))
+    if not persona:
+        persona = Persona(user_id=user_id, misc_persona={})
+        db.add(persona)
+        await db.commit()
+        await db.refresh(persona)
+
+    # update_persona committed whenever extraction returned anything
+    if persona.age is None:
+        persona.age = 28
+    await db.commit()
+
+    messages = (await db.scalars(
+        select(Message).filter_by(conversation_id=convo.id).order_by(Message.created_at)
+    )).all()
+    if len(messages) > 40:
+        convo.summary = "summary"
+        await db.commit()
+
+    db.add(Message(conversation_id=convo.id, role="assistant", content=reply))
+    await db.commit()
+
+
+async def run(counter, turn_fn, users: int) -> list[tuple[int, int, int]]:
+    from app.db.models import User
+    from app.db.session import AsyncSessionLocal
+
+    per_turn = []
+    for _ in range(users):
+        user_id = uuid.uuid4()
+        async with AsyncSessionLocal() as db:
+            db.add(User(id=user_id, email=f"{user_id}@bench.local"))
+            await db.commit()
+
+        for text in TURNS:
+            async with AsyncSessionLocal() as db:
+                before = counter.snapshot()
+                await turn_fn(db, user_id, text)
+                after = counter.snapshot()
+            per_turn.append(tuple(a - b for a, b in zip(after, before)))
+
+    return per_turn
+
+
+def report(name: str, per_turn: list[tuple[int, int, int]]):
+    first = per_turn[0]
+    rest = per_turn[1:len(TURNS)]
+
+    def avg(rows, i):
+        return sum(r[i] for r in rows) / len(rows)
+
+    def line(label, rows):
+        statements, begins, commits = avg(rows, 0), avg(rows, 1), avg(rows, 2)
+        print(
+            f"  {label:<14} statements {statements:5.1f}   transactions {commits:4.1f}   "
+            f"round trips {statements + begins + commits:5.1f}"
+        )
+
+    print(name)
+    line("first turn", [first])
+    line("later turns", rest)
+    line("all turns", per_turn)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--users", type=int, default=5)
+    args = parser.parse_args()
+
+    _configure_env(args.database_url)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.chat.routes import ChatRequest, chat
+    from app.db.session import async_engine, init_db
+
+    init_db()
+    install_llm_stub()
+    counter = StatementCounter(async_engine.sync_engine)
+
+    async def before(db, user_id, text):
+        await legacy_turn(db, user_id, text, "Hmmm\nAchha\nDekho...")
+
+    async def after(db, user_id, text):
+        await chat(ChatRequest(user_id=user_id, message=text), db=db)
+
+    print(f"{args.users} users x {len(TURNS)} turns, LLM stubbed\n")
+    report("before (commit per step)", await run(counter, before, args.users))
+    report("after (unit of work)", await run(counter, after, args.users))
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+"""
+Combined message analysis vs. separate intent + persona calls.
+
+Sends every message of a labelled corpus through
+- the two separate LLM calls (intent classifier, persona extractor)
+- the one combined message analysis call
+(LLM only, no local fast path, no response cache) and reports for each:
+- intent accuracy against the reference labels, and agreement
+  between the two
+- persona precision / recall against the expected fields: parsed
+  fields (age, height, weight, days, gender, diet) must match exactly,
+  free-text fields only need to be present
+- LLM calls and prompt / completion tokens
+
+It also counts the LLM calls the /chat pre-processing makes for the
+corpus with the local classifier and the persona signal filter in
+front: before (one call per part) and after (one call per message).
+
+The bundled corpus (bench/fixtures/analysis_corpus.jsonl) is labelled
+by hand. Needs OPENAI_API_KEY, or --base-url of a compatible server
+(e.g. bench.fake_openai, which only checks the plumbing).
+
+MESSAGE_ANALYSIS_COMBINED defaults to False until this has been run
+against the production model: switch it on only when the combined
+call's intent accuracy and persona precision / recall match the
+separate calls.
+
+Usage:
+    python -m bench.eval_analysis
+    python -m bench.eval_analysis --base-url http://127.0.0.1:8090/v1
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from pathlib import Path
+
+DEFAULT_CORPUS = Path(__file__).parent / "fixtures" / "analysis_corpus.jsonl"
+
+
+def _configure_env(base_url: str | None):
+    # Never touched, but the app modules need a database URL to import.
+    path = os.path.join(tempfile.mkdtemp(prefix="healthbot-bench-"), "bench.db")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{path}")
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("JWT_SECRET", "bench")
+    if base_url:
+        os.environ["OPENAI_BASE_URL"] = base_url
+
+
+def load_corpus(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def tokens(purposes: tuple[str, ...]) -> tuple[float, float]:
+    from app.core.metrics import LLM_TOKENS
+
+    prompt = sum(LLM_TOKENS.value(purpose=p, kind="prompt") for p in purposes)
+    completion = sum(LLM_TOKENS.value(purpose=p, kind="completion") for p in purposes)
+    return prompt, completion
+
+
+async def run_separate(rows: list[dict], fields: list[str]) -> list[tuple[str | None, dict]]:
+    from app.guardrails.service import _ask_llm_for_intent
+    from app.persona.service import _ask_llm_for_persona
+
+    async def one(message):
+        intent, persona = await asyncio.gather(
+            _ask_llm_for_intent(message),
+            _ask_llm_for_persona(message, fields),
+        )
+        return intent, persona or {}
+
+    return await asyncio.gather(*(one(r["message"]) for r in rows))
+
+
+async def run_combined(rows: list[dict], fields: list[str]) -> list[tuple[str | None, dict]]:
+    from app.chat.analysis import _ask_llm_for_analysis
+
+    async def one(message):
+        result = await _ask_llm_for_analysis(message, fields)
+        if result is None:
+            return None, {}
+        return result["intent"], result["persona"]
+
+    return await asyncio.gather(*(one(r["message"]) for r in rows))
+
+
+def score(rows: list[dict], results: list[tuple[str | None, dict]]) -> dict:
+    from app.persona.normalize import PARSERS
+
+    correct = 0
+    tp = fp = fn = 0
+    mistakes = []
+    for row, (intent, persona) in zip(rows, results):
+        if intent == row["label"]:
+            correct += 1
+        else:
+            mistakes.append((row["message"], "intent", row["label"], intent))
+
+        expected = row["persona"]
+        for field in set(expected) | set(persona):
+            if field not in persona:
+                fn += 1
+                mistakes.append((row["message"], field, expected[field], None))
+            elif field not in expected:
+                fp += 1
+                mistakes.append((row["message"], field, None, persona[field]))
+            elif field in PARSERS and persona[field] != expected[field]:
+                fp += 1
+                fn += 1
+                mistakes.append((row["message"], field, expected[field], persona[field]))
+            else:
+                tp += 1
+
+    return {
+        "intent_accuracy": correct / len(rows),
+        "persona_precision": tp / max(tp + fp, 1),
+        "persona_recall": tp / max(tp + fn, 1),
+        "mistakes": mistakes,
+    }
+
+
+def pipeline_calls(rows: list[dict]) -> tuple[int, int]:
+    """
+    LLM calls the /chat pre-processing makes for these messages (all
+    persona fields missing), before and after the combined call.
+    """
+    from app.chat.analysis import local_intent
+    from app.persona.service import has_persona_signal
+
+    before = after = 0
+    for row in rows:
+        parts = (local_intent(row["message"]) is None) + has_persona_signal(row["message"])
+        before += parts
+        after += parts > 0
+    return before, after
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--base-url", help="OpenAI-compatible server (default: OpenAI)")
+    parser.add_argument("--verbose", action="store_true", help="list every mistake")
+    args = parser.parse_args()
+
+    _configure_env(args.base_url)
+    from app.persona.service import EXTRACTABLE_FIELDS
+
+    rows = load_corpus(args.corpus)
+
+    start = tokens(("classify", "extract"))
+    separate = await run_separate(rows, EXTRACTABLE_FIELDS)
+    end = tokens(("classify", "extract"))
+    separate_tokens = (end[0] - start[0], end[1] - start[1])
+
+    start = tokens(("analyze",))
+    combined = await run_combined(rows, EXTRACTABLE_FIELDS)
+    end = tokens(("analyze",))
+    combined_tokens = (end[0] - start[0], end[1] - start[1])
+
+    agreement = sum(s[0] == c[0] for s, c in zip(separate, combined)) / len(rows)
+    before, after = pipeline_calls(rows)
+
+    print(f"corpus: {args.corpus} ({len(rows)} messages)\n")
+    print(f"{'':<10} {'intent acc':>10} {'persona P':>10} {'persona R':>10} {'calls':>6} {'prompt tok':>11} {'compl tok':>10}")
+    for name, results, calls, (prompt, completion) in (
+        ("separate", separate, 2 * len(rows), separate_tokens),
+        ("combined", combined, len(rows), combined_tokens),
+    ):
+        r = score(rows, results)
+        print(
+            f"{name:<10} {r['intent_accuracy']:>10.1%} {r['persona_precision']:>10.1%} "
+            f"{r['persona_recall']:>10.1%} {calls:>6} {prompt:>11.0f} {completion:>10.0f}"
+        )
+        if args.verbose and r["mistakes"]:
+            print("  mistakes (message | field | expected | got):")
+            for message, field, expected, got in r["mistakes"]:
+                print(f"    {message!r} | {field} | {expected} | {got}")
+
+    print(f"\nintent agreement (separate vs combined): {agreement:.1%}")
+    print(f"/chat pre-processing LLM calls: {before} separate -> {after} combined")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,234 @@
+"""
+Local fake OpenAI-compatible server for benchmarks and transport checks.
+
+Serves POST /v1/chat/completions (plain and stream=true SSE) with
+deterministic replies picked from the system prompt, plus configurable
+latency, tail latency and error injection. GET /stats reports request
+counts and peak concurrency.
+
+Usage:
+    python -m bench.fake_openai --port 8090 --latency 0.2 --error-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1 uvicorn app.main:app
+
+Or in-process from another bench script:
+    server = FakeOpenAI(latency=0.05).start()   # background thread
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+
+
+def fake_reply(messages: list[dict]) -> str:
+    """
+    Deterministic answer for each kind of prompt the app sends.
+    """
+    system = messages[0]["content"] if messages else ""
+    user = messages[-1]["content"] if messages else ""
+
+    age = re.search(r"(\d{2})\s*(?:saal|sal|years?|yrs?)", user)
+    persona = {"age": age.group(1)} if age else {}
+
+    if "analyse one user message" in system:
+        return json.dumps({"intent": "diet", "persona": persona})
+    if "intent classifier" in system:
+        return "diet"
+    if "JSON" in system:
+        return json.dumps(persona)
+    if "conversation memory" in system:
+        return "User wants diet help. Vegetarian, office job."
+    return "Hmmm\nAchha samjhi\nDekho, breakfast me poha ya oats le sakte ho.\n- protein ke liye dahi\n- chai kam cheeni"
+
+
+class FakeOpenAI:
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency: float = 2.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        stream_chunk_delay: float = 0.01,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_chunk_delay = stream_chunk_delay
+        self.host = host
+        self.port = port or _free_port()
+        self.random = random.Random(seed)
+        self.reset_stats()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def reset_stats(self):
+        self.requests = 0
+        self.errors = 0
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "peak_inflight": self.peak_inflight,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+    def _delay(self) -> float:
+        if self.tail_rate and self.random.random() < self.tail_rate:
+            return self.tail_latency
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def app(self):
+        from fastapi import FastAPI, Request
+        from fastapi.responses import JSONResponse, StreamingResponse
+
+        app = FastAPI()
+
+        @app.get("/stats")
+        def stats():
+            return self.stats()
+
+        @app.post("/v1/chat/completions")
+        async def completions(request: Request):
+            body = await request.json()
+            self.requests += 1
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+            try:
+                await asyncio.sleep(self._delay())
+
+                if self.error_rate and self.random.random() < self.error_rate:
+                    self.errors += 1
+                    return JSONResponse(
+                        {"error": {"message": "injected failure", "type": "server_error"}},
+                        status_code=self.error_status,
+                    )
+
+                text = fake_reply(body.get("messages", []))
+                usage = {
+                    "prompt_tokens": sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4,
+                    "completion_tokens": len(text) // 4,
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                self.prompt_tokens += usage["prompt_tokens"]
+                self.completion_tokens += usage["completion_tokens"]
+
+                if body.get("stream"):
+                    return StreamingResponse(self._sse(body, text, usage), media_type="text/event-stream")
+                return _completion(body, text, usage)
+            finally:
+                self.inflight -= 1
+
+        return app
+
+    async def _sse(self, body, text, usage):
+        cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        for piece in re.findall(r"\S+\s*|\s+", text):
+            chunk = {
+                "id": cid, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(self.stream_chunk_delay)
+
+        last = {
+            "id": cid, "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        if (body.get("stream_options") or {}).get("include_usage"):
+            last["usage"] = usage
+        yield f"data: {json.dumps(last)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    def start(self) -> "FakeOpenAI":
+        """
+        Runs the server in a daemon thread; returns once it accepts
+        connections.
+        """
+        import uvicorn
+
+        config = uvicorn.Config(self.app(), host=self.host, port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        threading.Thread(target=self._server.run, daemon=True).start()
+
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("fake OpenAI server did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+
+
+def _completion(body, text, usage) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": usage,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    server = FakeOpenAI(
+        latency=args.latency, jitter=args.jitter, tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency, error_rate=args.error_rate,
+        error_status=args.error_status, host=args.host, port=args.port,
+    )
+    print(f"fake OpenAI server on {server.base_url}")
+    uvicorn.run(server.app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
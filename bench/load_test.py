@@ -0,0 +1,248 @@
+"""
+Load test of the real /chat hot path with a fake LLM and a local database.
+
+Starts the deterministic fake OpenAI-compatible server
+(bench/fake_openai.py) with the requested latency, points the app at it
+through OPENAI_BASE_URL, and drives the FastAPI app in-process over
+ASGI. Each virtual user replays one synthetic multi-turn conversation;
+--long-share of them run past the summarization threshold
+(SUMMARY_TRIGGER_MESSAGES, 40 messages by default).
+
+Reports:
+- throughput (turns/s) and p50/p95/p99 turn latency, overall and for
+  turns after the conversation crossed the summary threshold
+- DB statements and transactions per turn (engine events)
+- LLM calls per turn, by purpose
+- with --speculative: speculation hit rate and estimated wasted tokens
+
+Usage:
+    python -m bench.load_test                                # temporary SQLite file
+    python -m bench.load_test --users 50 --llm-latency 0.3 --stream
+    python -m bench.load_test --database-url postgresql+psycopg2://... --json out.json
+
+Notes:
+- SQLite's CURRENT_TIMESTAMP has one-second resolution, so several
+  messages of a fast conversation share a created_at; the summary
+  watermark (created_at > summarized_until) is only exact on Postgres.
+- Every run creates new users; point --database-url at a scratch DB.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+OPENERS = [
+    "hi", "hello niva", "weight loss karna hai", "mujhe fit hona hai",
+    "skin pe acne bahut hai", "hairfall ho raha hai", "neend nahi aati",
+]
+PERSONA = [
+    "main {age} saal ka hu", "main {age} saal ki hu", "veg hu", "non veg khata hu",
+    "office job hai, din bhar baitha rehta hu", "height 5 foot 8 hai", "weight {weight} kg hai",
+    "goal fat loss hai", "gym jaata hu hafte me 3 din",
+]
+QUESTIONS = [
+    "breakfast me kya khau", "dinner me roti ya chawal", "protein kaise badhau",
+    "workout kitni der karu", "paani kitna pina chahiye", "chai chhod du kya",
+    "weekend pe cheat meal le sakte hai", "raat ko bhookh lagti hai kya karu",
+    "face wash kaunsa use karu", "sone se pehle phone chalana theek hai",
+    "ok thanks", "achha", "aur kuch tips do", "walk kitna karu",
+]
+
+
+def conversation(rng: random.Random, turns: int) -> list[str]:
+    messages = [rng.choice(OPENERS)]
+    for template in rng.sample(PERSONA, k=min(3, turns - 1)):
+        messages.append(template.format(age=rng.randint(18, 45), weight=rng.randint(50, 95)))
+    while len(messages) < turns:
+        messages.append(rng.choice(QUESTIONS))
+    return messages[:turns]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _configure_env(args, base_url: str):
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="healthbot-load-"), "load.db")
+        database_url = f"sqlite:///{path}"
+
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("JWT_SECRET", "bench")
+    # Cached classifier/extraction answers would hide LLM calls that a
+    # real, more varied conversation mix makes.
+    if args.no_llm_cache:
+        os.environ["LLM_CACHE_SIZE"] = "1"
+        os.environ["LLM_CACHE_TTL"] = "0"
+    if args.speculative:
+        os.environ["SPECULATIVE_REPLY"] = "true"
+
+
+async def run_user(client, user_id, messages, stream: bool, threshold: int, results: list):
+    path = "/chat/stream" if stream else "/chat/"
+    for i, text in enumerate(messages):
+        start = time.perf_counter()
+        response = await client.post(path, json={"user_id": str(user_id), "message": text})
+        elapsed = time.perf_counter() - start
+
+        ok = response.status_code == 200
+        if ok and stream:
+            ok = '"type": "done"' in response.text
+
+        # 2 messages per turn: past the threshold once the history
+        # before this turn already exceeds it.
+        results.append({"latency": elapsed, "ok": ok, "long": 2 * i > threshold})
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--users", type=int, default=20, help="concurrent conversations")
+    parser.add_argument("--turns", type=int, default=8, help="turns per short conversation")
+    parser.add_argument("--long-turns", type=int, default=30, help="turns per long conversation")
+    parser.add_argument("--long-share", type=float, default=0.25, help="share of long conversations")
+    parser.add_argument("--llm-latency", type=float, default=0.1)
+    parser.add_argument("--llm-jitter", type=float, default=0.02)
+    parser.add_argument("--stream", action="store_true", help="use POST /chat/stream")
+    parser.add_argument("--no-llm-cache", action="store_true", help="disable the LLM response cache")
+    parser.add_argument("--speculative", action="store_true", help="SPECULATIVE_REPLY=true (JSON endpoint only)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from bench.fake_openai import FakeOpenAI
+
+    fake = FakeOpenAI(latency=args.llm_latency, jitter=args.llm_jitter, seed=args.seed).start()
+    _configure_env(args, fake.base_url)
+
+    import httpx
+
+    from app.core.config import settings
+    from app.core.metrics import (
+        DB_STATEMENTS,
+        DB_TRANSACTIONS,
+        LLM_SECONDS,
+        SPECULATION_WASTED_TOKENS,
+        SPECULATIONS,
+    )
+    from app.db.models import User
+    from app.db.session import AsyncSessionLocal, async_engine, init_db
+    from app.main import app
+
+    init_db()
+
+    rng = random.Random(args.seed)
+    users = []
+    async with AsyncSessionLocal() as db:
+        for n in range(args.users):
+            user_id = uuid.uuid4()
+            db.add(User(id=user_id, email=f"{user_id}@load.local"))
+            turns = args.long_turns if n < round(args.users * args.long_share) else args.turns
+            users.append((user_id, conversation(rng, turns)))
+        await db.commit()
+
+    statements_before = DB_STATEMENTS.total()
+    transactions_before = DB_TRANSACTIONS.value(result="commit")
+    fake.reset_stats()
+
+    results: list[dict] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", timeout=None) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_user(client, user_id, messages, args.stream, settings.SUMMARY_TRIGGER_MESSAGES, results)
+            for user_id, messages in users
+        ))
+        elapsed = time.perf_counter() - start
+
+    turns = len(results)
+    latencies = [r["latency"] for r in results]
+    long_latencies = [r["latency"] for r in results if r["long"]]
+    llm_by_purpose = {}
+    for (purpose, _outcome), count in LLM_SECONDS.counts().items():
+        llm_by_purpose[purpose] = llm_by_purpose.get(purpose, 0) + count
+
+    report = {
+        "users": args.users,
+        "turns": turns,
+        "failed": sum(not r["ok"] for r in results),
+        "elapsed_s": elapsed,
+        "throughput_turns_per_s": turns / elapsed,
+        "latency_ms": {
+            "p50": statistics.median(latencies) * 1000,
+            "p95": percentile(latencies, 0.95) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+        },
+        "latency_ms_after_summary_threshold": {
+            "turns": len(long_latencies),
+            "p50": statistics.median(long_latencies) * 1000 if long_latencies else 0.0,
+            "p99": percentile(long_latencies, 0.99) * 1000,
+        },
+        "db_statements_per_turn": (DB_STATEMENTS.total() - statements_before) / turns,
+        "db_transactions_per_turn": (DB_TRANSACTIONS.value(result="commit") - transactions_before) / turns,
+        "llm_calls_per_turn": fake.requests / turns,
+        "llm_calls_per_turn_by_purpose": {p: n / turns for p, n in sorted(llm_by_purpose.items())},
+        "llm_tokens_per_turn": (fake.prompt_tokens + fake.completion_tokens) / turns,
+        "speculation": {
+            result: SPECULATIONS.value(result=result)
+            for result in ("hit", "blocked", "changed", "local", "failed")
+        },
+        "speculation_wasted_tokens": SPECULATION_WASTED_TOKENS.total(),
+    }
+
+    await async_engine.dispose()
+    fake.stop()
+
+    lat = report["latency_ms"]
+    long_lat = report["latency_ms_after_summary_threshold"]
+    print(
+        f"{args.users} users, {turns} turns ({report['failed']} failed), "
+        f"fake LLM {args.llm_latency * 1000:.0f}±{args.llm_jitter * 1000:.0f}ms, "
+        f"{'stream' if args.stream else 'json'}, {make_db_label(os.environ['DATABASE_URL'])}\n"
+    )
+    print(f"throughput         {report['throughput_turns_per_s']:.1f} turns/s ({elapsed:.1f}s)")
+    print(f"latency            p50 {lat['p50']:.0f}ms  p95 {lat['p95']:.0f}ms  p99 {lat['p99']:.0f}ms")
+    print(
+        f"  past summary     p50 {long_lat['p50']:.0f}ms  p99 {long_lat['p99']:.0f}ms "
+        f"({long_lat['turns']} turns)"
+    )
+    print(
+        f"DB per turn        {report['db_statements_per_turn']:.2f} statements, "
+        f"{report['db_transactions_per_turn']:.2f} transactions"
+    )
+    print(f"LLM per turn       {report['llm_calls_per_turn']:.2f} calls, {report['llm_tokens_per_turn']:.0f} tokens")
+    for purpose, n in report["llm_calls_per_turn_by_purpose"].items():
+        print(f"  {purpose:<16} {n:.2f}")
+
+    speculated = sum(report["speculation"].values())
+    if speculated:
+        print(
+            f"speculation        {report['speculation']['hit'] / speculated:.1%} hit rate "
+            f"of {speculated:.0f} ({report['speculation']}), "
+            f"{report['speculation_wasted_tokens']:.0f} wasted tokens"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+def make_db_label(url: str) -> str:
+    return url.split(":", 1)[0]
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
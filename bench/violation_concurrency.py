@@ -0,0 +1,173 @@
+"""
+Concurrency check for violation counting: many threads hammer one
+(user, conversation, intent) key and the final count must equal the
+number of calls.
+
+Runs three variants against the same database:
+- legacy:  the old SELECT → count += 1 in Python → commit
+- upsert:  log_violation (INSERT ... ON CONFLICT DO UPDATE ... RETURNING)
+- batched: ViolationWriter, many tasks in one worker, flushed in batches
+
+Each thread runs its own event loop with its own engine, like separate
+workers would. Exits non-zero when upsert or batched lose increments.
+
+Usage:
+    python -m bench.violation_concurrency                  # temporary SQLite file
+    python -m bench.violation_concurrency --database-url postgresql+psycopg2://...
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import uuid
+
+
+def _configure_env(database_url: str | None):
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="healthbot-bench-"), "bench.db")
+        database_url = f"sqlite:///{path}"
+
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("JWT_SECRET", "bench")
+
+
+async def legacy_log_violation(db, user_id, conversation_id, intent_type):
+    """
+    The pre-upsert read-modify-write.
+    """
+    from sqlalchemy import select
+
+    from app.db.models import ViolationLog
+
+    violation = await db.scalar(
+        select(ViolationLog)
+        .filter_by(user_id=user_id, conversation_id=conversation_id, intent_type=intent_type)
+        .limit(1)
+    )
+    if violation:
+        violation.count += 1
+    else:
+        db.add(ViolationLog(
+            user_id=user_id, conversation_id=conversation_id, intent_type=intent_type, count=1,
+        ))
+
+
+def _session_factory():
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from app.core.config import settings
+    from app.db.session import async_database_url
+
+    url = async_database_url(settings.DATABASE_URL)
+    connect_args = {"timeout": 30} if url.get_backend_name() == "sqlite" else {}
+    engine = create_async_engine(url, connect_args=connect_args)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+def hammer(log_fn, key, threads: int, calls: int) -> int:
+    """
+    Returns the number of calls that raised.
+    """
+    errors = 0
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal errors
+
+        async def run():
+            nonlocal errors
+            engine, session_factory = _session_factory()
+            for _ in range(calls):
+                try:
+                    async with session_factory() as db:
+                        await log_fn(db, *key)
+                        await db.commit()
+                except Exception:
+                    with lock:
+                        errors += 1
+            await engine.dispose()
+
+        asyncio.run(run())
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return errors
+
+
+async def hammer_batched(key, tasks: int, calls: int):
+    from app.guardrails.logger import ViolationWriter
+
+    engine, session_factory = _session_factory()
+    writer = ViolationWriter(session_factory, interval=0.01, batch_size=50)
+    writer.start()
+
+    async def worker():
+        for _ in range(calls):
+            writer.add(*key)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(worker() for _ in range(tasks)))
+    await writer.stop()
+    await engine.dispose()
+
+
+async def final_count(key) -> int:
+    from sqlalchemy import select
+
+    from app.db.models import ViolationLog
+
+    engine, session_factory = _session_factory()
+    async with session_factory() as db:
+        count = await db.scalar(
+            select(ViolationLog.count).filter_by(
+                user_id=key[0], conversation_id=key[1], intent_type=key[2],
+            )
+        )
+    await engine.dispose()
+    return count or 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=50, help="calls per thread")
+    args = parser.parse_args()
+
+    _configure_env(args.database_url)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.db.session import init_db
+    from app.guardrails.logger import log_violation
+
+    init_db()
+    expected = args.threads * args.calls
+    print(f"{args.threads} threads x {args.calls} calls on one key (expected count {expected})\n")
+
+    failed = False
+    for name, log_fn in (("legacy", legacy_log_violation), ("upsert", log_violation), ("batched", None)):
+        key = (uuid.uuid4(), uuid.uuid4(), "sexual")
+        if log_fn is None:
+            asyncio.run(hammer_batched(key, args.threads, args.calls))
+            errors = 0
+        else:
+            errors = hammer(log_fn, key, args.threads, args.calls)
+
+        count = asyncio.run(final_count(key))
+        lost = expected - errors - count
+        print(f"  {name:<8} final count {count:5d}   errors {errors:4d}   lost updates {lost:4d}")
+
+        if name != "legacy" and (count != expected or errors):
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -99,7 +99,7 @@ async function sendMessage() {
   }
 
   try {
-    const res = await fetch("http://127.0.0.1:8000/chat/", {
+    const res = await fetch("http://127.0.0.1:8000/chat/stream", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify({ user_id: userId, message }),
@@ -110,8 +110,16 @@ async function sendMessage() {
       return;
     }
 
-    const data = await res.json();
-    renderNivaReply(data.reply);
+    if (!res.body || !res.body.getReader) {
+      // No streaming support: read the whole NDJSON body at once
+      const events = (await res.text()).split("\n").filter(Boolean).map(JSON.parse);
+      const done = events.find((e) => e.type === "done");
+      if (done) renderNivaReply(done.reply);
+      else appendMessage("Something went wrong. Try again.", "niva");
+      return;
+    }
+
+    await readReplyStream(res.body.getReader());
 
   } catch (error) {
     appendMessage("Backend not reachable.", "niva");
@@ -123,6 +131,50 @@ async function sendMessage() {
 }
 
 
+// ─────────────────────────────────────────────
+// STREAMED REPLY (NDJSON: bubble / done / error)
+// ─────────────────────────────────────────────
+// Bubbles arrive one line at a time and are laid out the same way as
+// renderNivaReply: line 1 and line 2 get their own bubble, everything
+// after that grows one "main" bubble.
+
+async function readReplyStream(reader) {
+  const decoder = new TextDecoder();
+  const lines = [];
+  let mainBubble = null;
+  let buffered = "";
+
+  const onEvent = (event) => {
+    if (event.type === "bubble") {
+      lines.push(event.text);
+      if (lines.length <= 2) {
+        appendMessage(event.text, "niva");
+      } else if (!mainBubble) {
+        mainBubble = appendMessage(event.text, "niva");
+      } else {
+        mainBubble.innerHTML = formatMarkdownBlock(lines.slice(2).join("\n"));
+        chatWindow.scrollTop = chatWindow.scrollHeight;
+      }
+      if (typingIndicator) typingIndicator.classList.add("hidden");
+    } else if (event.type === "error") {
+      appendMessage(event.message || "Something went wrong. Try again.", "niva");
+    }
+  };
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+
+    buffered += decoder.decode(value, { stream: true });
+    const parts = buffered.split("\n");
+    buffered = parts.pop();
+    parts.filter(Boolean).forEach((line) => onEvent(JSON.parse(line)));
+  }
+
+  if (buffered.trim()) onEvent(JSON.parse(buffered));
+}
+
+
 // ─────────────────────────────────────────────
 // MESSAGE RENDERING
 // ─────────────────────────────────────────────
@@ -184,6 +236,7 @@ function appendMessage(text, sender) {
 
   chatWindow.appendChild(bubble);
   chatWindow.scrollTop = chatWindow.scrollHeight;
+  return bubble;
 }
 
 function renderNivaReply(replyText) {